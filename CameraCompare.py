@@ -2,7 +2,7 @@ from picamera2 import Picamera2, MappedArray, Preview
 from PIL import Image, ImageTk
 from gpiozero import Button, OutputDevice
 import tkinter as tk
-import pytesseract
+from tesseract_api import create_ocr_engine
 import threading
 import time
 import cv2
@@ -32,6 +32,8 @@ class DualOCRApp:
         self.ocr_lock = threading.Lock()
         self.running = True
         self.lensposition = 0.0
+        # One resident tesseract engine instead of a tesseract process per read
+        self.ocr = create_ocr_engine(psm=7)
 
         # Setup two cameras
         self.cam1 = Picamera2(0)
@@ -247,7 +249,7 @@ class DualOCRApp:
                 x1, y1, x2, y2 = roi
                 cropped = frame[y1:y2, x1:x2]
                 gray = cv2.cvtColor(cropped, cv2.COLOR_RGB2GRAY)
-                text = pytesseract.image_to_string(gray, config="--psm 7 -c tessedit_char_whitelist=0123456789")
+                text = self.ocr.recognize(gray)
                 return ''.join(filter(str.isdigit, text))
 
             digits1 = extract_digits(frame1, self.roi1)
@@ -61,33 +61,39 @@ total = 0
 
 start_time = time.time()
 
-# Process images
-for img_path in IMG_DIR.glob("*.png"):
-    total += 1
-    # Get expected value from filename (first 5 digits)
-    expected = img_path.name[:5]
-
-    # Read and preprocess image
-    img = cv2.imread(str(img_path))
-    #img = preprocess_image(raw)
-
-    segments = segment_digits(img)
-    digits = []
-    for _, _, digit_img in segments:
-        digit_img = center_and_pad(digit_img)
-        # resize to your CNN�s input size (64�64), normalize, etc.
-        d = cv2.resize(digit_img, (64,64), interpolation=cv2.INTER_CUBIC)
-        d = d.reshape(1,64,64,1)/255.0
-        pred = model.predict(d)
-        digits.append(str(pred.argmax()))
-    ocr_digits = "".join(digits)  
-
-    # Compare
-    if ocr_digits == expected:
-        correct += 1
-    else:
-        errors += 1
-        print(f"[ERROR] {img_path.name} ? expected: {expected}, got: {ocr_digits}")
+# Process images two at a time, like the two cameras of one trigger: every digit of both
+# goes into one (N, 64, 64, 1) float32 batch and through one direct model call, as in production
+paths = sorted(IMG_DIR.glob("*.png"))
+for pair in (paths[i:i + 2] for i in range(0, len(paths), 2)):
+    glyphs, owner = [], []
+    for n, img_path in enumerate(pair):
+        # Read and preprocess image
+        img = cv2.imread(str(img_path))
+        #img = preprocess_image(raw)
+
+        for _, _, digit_img in segment_digits(img):
+            digit_img = center_and_pad(digit_img)
+            # resize to the CNN input size (64x64)
+            glyphs.append(cv2.resize(digit_img, (64,64), interpolation=cv2.INTER_CUBIC))
+            owner.append(n)
+
+    preds = np.zeros((0, 10), dtype=np.float32)
+    if glyphs:
+        batch = np.stack(glyphs)[..., None].astype(np.float32) / 255.0
+        preds = np.asarray(model(batch, training=False))
+
+    for n, img_path in enumerate(pair):
+        total += 1
+        # Get expected value from filename (first 5 digits)
+        expected = img_path.name[:5]
+        ocr_digits = "".join(str(pred.argmax()) for pred, o in zip(preds, owner) if o == n)
+
+        # Compare
+        if ocr_digits == expected:
+            correct += 1
+        else:
+            errors += 1
+            print(f"[ERROR] {img_path.name} ? expected: {expected}, got: {ocr_digits}")
 
 # End timing
 end_time = time.time()
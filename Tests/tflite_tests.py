@@ -0,0 +1,65 @@
+import sys
+import tensorflow as tf
+import cv2
+import numpy as np
+from pathlib import Path
+import time
+
+BASE = Path(__file__).parent.resolve()
+sys.path.insert(0, str(BASE / ".."))
+from tflite_engine import TFLiteModel
+from segment_digits import ai_helper
+from recognizers import center_and_pad
+
+
+# python tflite_tests.py [model name] [image folder], the converted models come from ai_model/convert_tflite.py
+NAME = sys.argv[1] if len(sys.argv) > 1 else "digit_cnn_model7"
+IMG_DIR = Path(sys.argv[2]) if len(sys.argv) > 2 else BASE / "img3"
+MODEL_DIR = BASE / "../ai_model"
+THREADS = 4
+print(f"Using input directory: {IMG_DIR}")
+
+keras = tf.keras.models.load_model(MODEL_DIR / f"{NAME}.keras")
+size = keras.input_shape[1]
+
+# Segment and normalise every image once, so only inference gets timed
+samples = []
+for img_path in sorted(IMG_DIR.glob("*.png")):
+    img = cv2.imread(str(img_path), cv2.IMREAD_GRAYSCALE)
+    glyphs = [cv2.resize(center_and_pad(d), (size,size), interpolation=cv2.INTER_CUBIC) for _, _, d in ai_helper.segment_digits(None, img)]
+    if glyphs:
+        samples.append((img_path.name[:5], np.stack(glyphs)[..., None].astype(np.float32) / 255.0))
+
+models = {
+    "keras": keras,
+    "tflite fp16": TFLiteModel(MODEL_DIR / f"{NAME}_fp16.tflite", THREADS),
+    "tflite int8": TFLiteModel(MODEL_DIR / f"{NAME}_int8.tflite", THREADS),
+}
+
+baseline = None
+for name, model in models.items():
+    # Warm up, the first call builds the graph / the delegate
+    model(samples[0][1], training=False)
+
+    correct = 0
+    agree = 0
+    predictions = []
+    latencies = []
+    for expected, batch in samples:
+        start = time.perf_counter()
+        preds = np.asarray(model(batch, training=False))
+        latencies.append(time.perf_counter() - start)
+
+        digits = "".join(str(p.argmax()) for p in preds)
+        predictions.append(digits)
+        correct += digits == expected
+
+    if baseline is None:
+        baseline = predictions
+    agree = sum(a == b for a, b in zip(predictions, baseline))
+    latencies = np.array(latencies) * 1000
+
+    print(f"\n{name}")
+    print(f"  Accuracy: {correct}/{len(samples)} ({100 * correct / len(samples):.1f}%)")
+    print(f"  Same as keras: {agree}/{len(samples)}")
+    print(f"  Latency per image: mean {latencies.mean():.2f} ms, p95 {np.percentile(latencies, 95):.2f} ms")
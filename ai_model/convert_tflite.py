@@ -0,0 +1,75 @@
+import sys
+import tensorflow as tf
+import numpy as np
+from pathlib import Path
+
+# Converts the Keras digit CNN into the TFLite models the TFLite engine runs:
+#   <model>_fp16.tflite  float16 weights, float32 in/out
+#   <model>_int8.tflite  full integer, int8 in/out, calibrated on the training set
+# and checks both against the Keras model on training set batches not used for the calibration.
+#   python convert_tflite.py [model name] [training set dir]
+BASE = Path(__file__).parent.resolve()
+sys.path.insert(0, str(BASE / ".."))
+from tflite_engine import TFLiteModel
+
+NAME = sys.argv[1] if len(sys.argv) > 1 else "digit_cnn_model7"
+DATA_DIR = Path(sys.argv[2]) if len(sys.argv) > 2 else BASE / "TrainingSet7/"
+MODEL = BASE / f"{NAME}.keras"
+CALIBRATION_BATCHES = 20
+CHECK_BATCHES = 20
+
+model = tf.keras.models.load_model(MODEL)
+size = model.input_shape[1]
+print(f"Converting {MODEL} ({size}x{size} input)")
+
+# 1) float16
+converter = tf.lite.TFLiteConverter.from_keras_model(model)
+converter.optimizations = [tf.lite.Optimize.DEFAULT]
+converter.target_spec.supported_types = [tf.float16]
+fp16 = converter.convert()
+(BASE / f"{NAME}_fp16.tflite").write_bytes(fp16)
+print(f"float16: {len(fp16) / 1024:.0f} kB")
+
+# 2) full int8, the activation ranges come from real digits, normalised the same way as in train.py
+dataset = tf.keras.preprocessing.image_dataset_from_directory(
+    DATA_DIR,
+    labels="inferred",
+    label_mode="int",
+    color_mode="grayscale",
+    batch_size=16,
+    image_size=(size,size),
+    shuffle=True,
+    seed=32,
+)
+
+# One pass over the (reshuffling) dataset, so the check batches are never calibration batches
+batches = [(images / 255.0, labels) for images, labels in dataset.take(CALIBRATION_BATCHES + CHECK_BATCHES).as_numpy_iterator()]
+
+def representative_dataset():
+    for images, _ in batches[:CALIBRATION_BATCHES]:
+        for image in images:
+            yield [np.expand_dims(image, 0).astype(np.float32)]
+
+converter = tf.lite.TFLiteConverter.from_keras_model(model)
+converter.optimizations = [tf.lite.Optimize.DEFAULT]
+converter.representative_dataset = representative_dataset
+converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+converter.inference_input_type = tf.int8
+converter.inference_output_type = tf.int8
+int8 = converter.convert()
+(BASE / f"{NAME}_int8.tflite").write_bytes(int8)
+print(f"int8: {len(int8) / 1024:.0f} kB")
+
+# 3) Check the converted models on digits the calibration did not see
+check = batches[CALIBRATION_BATCHES:]
+if not check:
+    sys.exit("No digits left to check the converted models on")
+images = np.concatenate([images for images, _ in check]).astype(np.float32)
+labels = np.concatenate([labels for _, labels in check])
+
+expected = np.asarray(model(images, training=False)).argmax(axis=1)
+print(f"\nkeras: accuracy {100 * np.mean(expected == labels):.1f}% on {len(labels)} digits")
+for variant in ("fp16", "int8"):
+    predicted = TFLiteModel(BASE / f"{NAME}_{variant}.tflite")(images).argmax(axis=1)
+    print(f"{variant}: accuracy {100 * np.mean(predicted == labels):.1f}%, "
+          f"same as keras {100 * np.mean(predicted == expected):.1f}%")
@@ -0,0 +1,49 @@
+import sys
+import tensorflow as tf
+import numpy as np
+from pathlib import Path
+
+# Writes the weights of the Keras digit CNN to an .npz the NumPy runtime (numpy_cnn.py) can run
+# without TensorFlow. Only the layer types the CNN in train.py uses are supported.
+BASE = Path(__file__).parent.resolve()
+MODEL = BASE / "digit_cnn_model7.keras"
+OUT = BASE / "digit_cnn_model7.npz"
+
+model = tf.keras.models.load_model(MODEL)
+
+arrays = {}
+kinds = []
+activations = []
+for layer in model.layers:
+    config = layer.get_config()
+    match layer:
+        case tf.keras.layers.Conv2D():
+            if config["padding"] != "valid" or tuple(config["strides"]) != (1, 1):
+                raise ValueError(f"{layer.name}: only valid, stride 1 convolutions are supported")
+            kinds.append("conv")
+        case tf.keras.layers.MaxPooling2D():
+            if config["padding"] != "valid" or tuple(config["pool_size"]) != (2, 2) or tuple(config["strides"]) != (2, 2):
+                raise ValueError(f"{layer.name}: only 2x2 valid max pooling is supported")
+            kinds.append("pool")
+        case tf.keras.layers.Flatten():
+            kinds.append("flatten")
+        case tf.keras.layers.Dense():
+            kinds.append("dense")
+        case _:
+            raise ValueError(f"{layer.name}: {type(layer).__name__} is not supported")
+
+    activations.append(config.get("activation", "linear"))
+    weights = layer.get_weights()
+    if weights:
+        arrays[f"w{len(kinds) - 1}"] = weights[0].astype(np.float32)
+        arrays[f"b{len(kinds) - 1}"] = weights[1].astype(np.float32)
+
+np.savez(OUT, kinds=np.array(kinds), activations=np.array(activations), **arrays)
+print(f"Exported {len(kinds)} layers to {OUT}")
+
+# Check the export against Keras on random digits
+sys.path.insert(0, str(BASE.parent))
+from numpy_cnn import NumpyCNN
+batch = np.random.default_rng(0).random((16, 64, 64, 1), dtype=np.float32)
+diff = np.abs(NumpyCNN(OUT)(batch) - model(batch, training=False).numpy()).max()
+print(f"Max difference to Keras: {diff:.2e}")
@@ -0,0 +1,14 @@
+import tensorflow as tf
+import tf2onnx
+from pathlib import Path
+
+# Exports the Keras digit CNN to ONNX for the OpenCV DNN engine (opencv_dnn_engine.py).
+# The input is NCHW, the layout cv2.dnn.blobFromImages produces, with a free batch dimension.
+BASE = Path(__file__).parent.resolve()
+MODEL = BASE / "digit_cnn_model7.keras"
+OUT = BASE / "digit_cnn_model7.onnx"
+
+model = tf.keras.models.load_model(MODEL)
+spec = [tf.TensorSpec((None, 64, 64, 1), tf.float32, name="input")]
+tf2onnx.convert.from_keras(model, input_signature=spec, opset=13, inputs_as_nchw=["input"], output_path=str(OUT))
+print(f"Exported {MODEL} to {OUT}")
@@ -0,0 +1,77 @@
+import time
+from enumerations import FrameQuality
+
+
+class CaptureCoordinator:
+    """Pairs the ROI frames of both cameras by SensorTimestamp so both reads show the same moment.
+    A pair that cannot be made is reported with a FrameQuality reason, like a frame the gate rejects."""
+
+    def __init__(self, cameras, tolerance_ms=0.0, timeout=0.2, gate=None, retries=2):
+        self._cameras = cameras
+        # 0 is automatic: free running cameras with an arbitrary phase offset are never closer than
+        # half a frame period, synced sensors get far better than that.
+        self._tolerance_ms = tolerance_ms
+        self._timeout = timeout
+        self._gate = gate
+        self._retries = retries
+
+
+    def set_gate(self, gate):
+        self._gate = gate
+
+
+    def tolerance_ns(self):
+        if self._tolerance_ms > 0:
+            return int(self._tolerance_ms * 1_000_000)
+        periods = [p for p in (cam.frame_period() for cam in self._cameras) if p]
+        if not periods:
+            return 50_000_000
+        return max(periods) // 2 + 1_000_000
+
+
+    def pair(self, frame_ns):
+        # Both rings fill on their own camera thread, so waiting on them one after the
+        # other costs no more than waiting for the slowest camera.
+        deadline = time.monotonic() + self._timeout
+        shots = [cam.capture_roi_at(frame_ns, timeout=max(0.0, deadline - time.monotonic())) for cam in self._cameras]
+        (f0, t0), (f1, t1) = shots
+        if f0 is None or f1 is None:
+            return None, 0, (FrameQuality.NO_FRAME, FrameQuality.NO_FRAME)
+
+        tolerance_ns = self.tolerance_ns()
+        skew = abs(t0 - t1)
+        if skew > tolerance_ns:
+            # Re-pair each frame with the other camera's frame nearest to it and keep the tighter pair
+            f1b, t1b = self._cameras[1].capture_roi_at(t0)
+            f0b, t0b = self._cameras[0].capture_roi_at(t1)
+            if abs(t0 - t1b) <= abs(t0b - t1):
+                f1, t1 = f1b, t1b
+            else:
+                f0, t0 = f0b, t0b
+            skew = abs(t0 - t1)
+
+        if skew > tolerance_ns:
+            return None, skew, (FrameQuality.OUT_OF_SYNC, FrameQuality.OUT_OF_SYNC)
+        return self._gated((f0, f1), (t0, t1), skew, tolerance_ns)
+
+
+    def _gated(self, frames, timestamps, skew, tolerance_ns):
+        # Replace a pair that fails the quality gate by the next pair from the rings,
+        # both cameras advance together so the pair stays synchronized.
+        if self._gate is None:
+            return frames, skew, (FrameQuality.OK, FrameQuality.OK)
+
+        quality = tuple(self._gate.check(f) for f in frames)
+        for _ in range(self._retries):
+            if all(q == FrameQuality.OK for q in quality):
+                break
+            shots = [cam.capture_roi_after(t, timeout=self._timeout) for cam, t in zip(self._cameras, timestamps)]
+            next_frames = tuple(f for f, _ in shots)
+            next_timestamps = tuple(t for _, t in shots)
+            if any(f is None for f in next_frames) or abs(next_timestamps[0] - next_timestamps[1]) > tolerance_ns:
+                break
+            frames, timestamps = next_frames, next_timestamps
+            skew = abs(timestamps[0] - timestamps[1])
+            quality = tuple(self._gate.check(f) for f in frames)
+
+        return frames, skew, quality
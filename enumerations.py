@@ -3,3 +3,19 @@ from enum import Enum
 class EngineType(Enum):
     PYTESSERACT_OCR = "PyTesseract OCR"
     AI_MODEL = "AI Model"
+    AI_MODEL_TFLITE = "AI Model (TFLite)"
+    AI_MODEL_OPENCV = "AI Model (OpenCV DNN)"
+    TEMPLATE_MATCH = "Template matching"
+    IMAGE_SIMILARITY = "Image similarity"
+    CASCADE = "Cascade"
+
+
+class FrameQuality(Enum):
+    OK = "ok"
+    BLURRED = "blurred"
+    LOW_CONTRAST = "low contrast"
+    OVEREXPOSED = "overexposed"
+    UNDEREXPOSED = "underexposed"
+    MOTION_BLUR = "motion blur"
+    NO_FRAME = "no frame"
+    OUT_OF_SYNC = "out of sync"
@@ -0,0 +1,52 @@
+import time
+import cv2
+import numpy as np
+
+
+def roi_sharpness(gray):
+    # Variance of the Laplacian: high for crisp edges, low for a blurred ROI
+    return float(cv2.Laplacian(gray, cv2.CV_32F).var())
+
+
+class FocusSweep:
+    """Coarse-to-fine search over LensPosition that scores only the ROI of a camera widget."""
+
+    def __init__(self, camera, coarse_steps=9, fine_steps=5, rounds=2, settle=0.15):
+        self._camera = camera
+        self._coarse_steps = coarse_steps
+        self._fine_steps = fine_steps
+        self._rounds = rounds
+        self._settle = settle
+        self._scores = {}
+
+
+    def run(self):
+        mn, mx, _ = self._camera.picam2.camera_controls["LensPosition"]
+
+        positions = np.linspace(mn, mx, self._coarse_steps)
+        best = self._best_of(positions)
+
+        # Each round zooms in on the interval around the best position so far
+        step = positions[1] - positions[0]
+        for _ in range(self._rounds):
+            positions = np.linspace(max(mn, best - step), min(mx, best + step), self._fine_steps)
+            best = self._best_of(positions)
+            step = positions[1] - positions[0]
+
+        return best, self._scores[best]
+
+
+    def _best_of(self, positions):
+        for pos in positions:
+            pos = round(float(pos), 2)
+            if pos not in self._scores:
+                self._scores[pos] = self._score(pos)
+        return max(self._scores, key=self._scores.get)
+
+
+    def _score(self, pos):
+        # Give the lens time to move, then score the next complete frame
+        self._camera.picam2.set_controls({"LensPosition": pos})
+        time.sleep(self._settle)
+        gray, _ = self._camera.capture_roi()
+        return roi_sharpness(gray)
@@ -0,0 +1,84 @@
+from itertools import islice
+from pathlib import Path
+import cv2
+import numpy as np
+from enumerations import FrameQuality
+from focus_sweep import roi_sharpness
+from template_bank import CAPTURE_NAME
+
+
+def motion_ratio(gray):
+    # Edge width per axis: second over first derivative is high for crisp edges and drops when the
+    # edges are smeared. Motion blurs one axis only, so the two disagree. The ratio of ratios does not
+    # depend on how many edges of each direction the digits have ("111" is nearly all vertical strokes).
+    f = gray.astype(np.float32)
+    sharp = []
+    for axis in (0, 1):
+        d1 = np.abs(np.diff(f, axis=axis)).sum()
+        d2 = np.abs(np.diff(f, n=2, axis=axis)).sum()
+        sharp.append(d2 / d1 if d1 > 0 else 0.0)
+    if max(sharp) == 0:
+        return 0.0
+    return float(1.0 - min(sharp) / max(sharp))
+
+
+def measure(gray):
+    # Everything check() looks at: the clip levels, contrast, sharpness and motion ratio
+    lo, hi = np.percentile(gray, (2, 98))
+    return float(lo), float(hi), float(hi - lo), roi_sharpness(gray), motion_ratio(gray)
+
+
+class QualityGate:
+    """Cheap checks on a grayscale ROI that decide whether running recognition on it is worth it."""
+
+    def __init__(self, min_sharpness=20.0, min_contrast=40.0, max_motion=0.25, clip_high=250, clip_low=5):
+        self.min_sharpness = min_sharpness
+        self.min_contrast = min_contrast
+        self.max_motion = max_motion
+        self._clip_high = clip_high
+        self._clip_low = clip_low
+
+
+    @classmethod
+    def calibrate(cls, paths, margin=0.5, min_captures=20, limit=200, scan=2000, **kwargs):
+        # Thresholds from captures that were read before: a frame is unreadable when it is clearly worse
+        # than nearly all of them. None when there are too few captures to say.
+        # The captures folder grows without bound, only the first scan captures are looked at for the newest.
+        paths = sorted(islice((p for p in paths if CAPTURE_NAME.match(Path(p).stem)), scan),
+                       key=lambda p: Path(p).stat().st_mtime, reverse=True)[:limit]
+        measured = []
+        for path in paths:
+            gray = cv2.imread(str(path), cv2.IMREAD_GRAYSCALE)
+            if gray is not None and gray.size:
+                measured.append(measure(gray)[2:])
+        if len(measured) < min_captures:
+            return None
+
+        contrast, sharpness, motion = np.array(measured).T
+        return cls(min_sharpness=margin * float(np.percentile(sharpness, 5)),
+                   min_contrast=margin * float(np.percentile(contrast, 5)),
+                   max_motion=max(float(np.percentile(motion, 99)) + 0.1, 0.15), **kwargs)
+
+
+    def check(self, gray):
+        if gray.size == 0:
+            return FrameQuality.LOW_CONTRAST
+
+        # Clipping: a white label background may saturate, but when even the darkest
+        # pixels (the ink) are clipped the digits are gone.
+        lo, hi = np.percentile(gray, (2, 98))
+        if lo >= self._clip_high:
+            return FrameQuality.OVEREXPOSED
+        if hi <= self._clip_low:
+            return FrameQuality.UNDEREXPOSED
+
+        if hi - lo < self.min_contrast:
+            return FrameQuality.LOW_CONTRAST
+
+        if roi_sharpness(gray) < self.min_sharpness:
+            return FrameQuality.BLURRED
+
+        if motion_ratio(gray) > self.max_motion:
+            return FrameQuality.MOTION_BLUR
+
+        return FrameQuality.OK
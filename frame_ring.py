@@ -0,0 +1,75 @@
+import threading
+import numpy as np
+
+
+class FrameRing:
+    """Fixed size ring of the last frames (or ROIs) of one camera, tagged with their SensorTimestamp (ns)."""
+
+    def __init__(self, size, shape, dtype=np.uint8):
+        self._frames = np.zeros((size, *shape), dtype=dtype)
+        self._timestamps = np.zeros(size, dtype=np.int64)
+        self._count = 0
+        self._cond = threading.Condition()
+
+
+    def reset(self, shape):
+        # Only reallocate when the ROI size really changed, buffered frames are dropped
+        with self._cond:
+            if self._frames.shape[1:] != tuple(shape):
+                self._frames = np.zeros((len(self._timestamps), *shape), dtype=self._frames.dtype)
+            self._count = 0
+
+
+    def push(self, array, timestamp):
+        with self._cond:
+            # A request that was in flight while the ROI changed no longer fits, skip it
+            if array.shape != self._frames.shape[1:]:
+                return
+            slot = self._count % len(self._timestamps)
+            np.copyto(self._frames[slot], array)
+            self._timestamps[slot] = timestamp
+            self._count += 1
+            self._cond.notify_all()
+
+
+    def frame_period(self):
+        # Median interval of the buffered frames (ns), None until there are two
+        with self._cond:
+            filled = min(self._count, len(self._timestamps))
+            if filled < 2:
+                return None
+            return int(np.median(np.diff(np.sort(self._timestamps[:filled]))))
+
+
+    def nearest(self, timestamp, timeout=0.0):
+        # The requested moment can lie in the future (trigger offset), wait until a frame
+        # at or after it has arrived before selecting, or until the timeout passes.
+        with self._cond:
+            self._cond.wait_for(lambda: self._newest() >= timestamp, timeout=timeout)
+
+            filled = min(self._count, len(self._timestamps))
+            if filled == 0:
+                return None, None
+
+            slot = int(np.abs(self._timestamps[:filled] - timestamp).argmin())
+            return self._frames[slot].copy(), int(self._timestamps[slot])
+
+
+    def next_after(self, timestamp, timeout=0.0):
+        # The oldest buffered frame newer than timestamp, waiting for one if needed
+        with self._cond:
+            self._cond.wait_for(lambda: self._newest() > timestamp, timeout=timeout)
+
+            filled = min(self._count, len(self._timestamps))
+            newer = np.flatnonzero(self._timestamps[:filled] > timestamp)
+            if len(newer) == 0:
+                return None, None
+
+            slot = int(newer[self._timestamps[newer].argmin()])
+            return self._frames[slot].copy(), int(self._timestamps[slot])
+
+
+    def _newest(self):
+        if self._count == 0:
+            return -1
+        return self._timestamps[(self._count - 1) % len(self._timestamps)]
@@ -0,0 +1,60 @@
+import cv2
+import numpy as np
+
+
+def _normalise(gray, height):
+    # Binarized ink (digits white on black), scaled to a common height and lightly blurred so
+    # a one pixel difference in stroke edges does not count as a difference
+    _, ink = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    width = max(1, round(ink.shape[1] * height / ink.shape[0]))
+    ink = cv2.resize(ink, (width, height), interpolation=cv2.INTER_AREA).astype(np.float32) / 255.0
+    return cv2.GaussianBlur(ink, (0, 0), 1.0)
+
+
+def _pad(img, shape):
+    out = np.zeros(shape, dtype=np.float32)
+    out[:img.shape[0], :img.shape[1]] = img
+    return out
+
+
+def register(a, b):
+    # Affine warp that maps b onto a: phase correlation for the translation, refined by ECC
+    # for the small scale and rotation differences between the two camera views
+    (dx, dy), _ = cv2.phaseCorrelate(a, b)
+    warp = np.array([[1, 0, dx], [0, 1, dy]], dtype=np.float32)
+    try:
+        criteria = (cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 50, 1e-4)
+        _, warp = cv2.findTransformECC(a, b, warp, cv2.MOTION_AFFINE, criteria, None, 5)
+    except cv2.error:
+        # ECC did not converge, the translation alone is still a usable registration
+        pass
+    return warp
+
+
+def roi_similarity(gray0, gray1, height=48):
+    """Lowest local normalised cross-correlation of the two binarized ROIs after registering cam1
+    onto cam0, 1.0 is identical print."""
+    a = _normalise(gray0, height)
+    b = _normalise(gray1, height)
+    shape = (height, max(a.shape[1], b.shape[1]))
+    a = _pad(a, shape)
+    b = _pad(b, shape)
+
+    warp = register(a, b)
+    b = cv2.warpAffine(b, warp, (shape[1], shape[0]), flags=cv2.INTER_LINEAR + cv2.WARP_INVERSE_MAP)
+
+    # A single different digit barely moves a global correlation, so score the worst digit sized window
+    win = (height // 2, height)
+    ab = cv2.boxFilter(a * b, -1, win, normalize=False)
+    aa = cv2.boxFilter(a * a, -1, win, normalize=False)
+    bb = cv2.boxFilter(b * b, -1, win, normalize=False)
+    sa = cv2.boxFilter(a, -1, win, normalize=False)
+    sb = cv2.boxFilter(b, -1, win, normalize=False)
+    n = win[0] * win[1]
+    cov = ab - sa * sb / n
+    norm = np.sqrt(np.maximum(aa - sa * sa / n, 0) * np.maximum(bb - sb * sb / n, 0))
+    # Only windows with ink in them say something about the print
+    inked = norm > 0.05 * norm.max()
+    if not inked.any():
+        return 0.0
+    return float((cov[inked] / norm[inked]).min())
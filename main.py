@@ -1,5 +1,6 @@
 import sys
 import re
+import argparse
 import cv2
 import numpy
 from PySide6 import QtWidgets, QtCore
@@ -7,24 +8,53 @@ from PySide6.QtCore import QSettings, Signal, Qt, QUrl
 from PySide6.QtWidgets import QFileDialog, QInputDialog, QLineEdit, QMessageBox
 from PySide6.QtGui import QIcon
 from PySide6.QtMultimedia import QSoundEffect
-from qglpicamera2_wrapper import QGlPicamera2
 from mainWindow import Ui_MainWindow
 from functools import partial
-from libcamera import controls
+from collections import deque
 from capture_thread import CaptureThread
 from run_ocr_thread import RunOCRThread
+from run_stitched_ocr_thread import RunStitchedOCRThread
 from run_ai_thread import RunAIThread
+from run_template_thread import RunTemplateThread
+from run_similarity_thread import RunSimilarityThread
+from run_cascade_thread import RunCascadeThread
 from run_image_thread import RunImageThread
+from run_capture_thread import RunCaptureThread
+from run_focus_thread import RunFocusThread
+from run_engine_load_thread import RunEngineLoadThread
+from capture_coordinator import CaptureCoordinator
+from frame_quality import QualityGate
+from roi_camera import ROI_COLOUR, ROI_COLOUR_ERROR
+from roi_tracker import RoiTracker
+from ocr_preprocess import PreprocessPipeline
+from result_cache import RecognitionCache
+from template_bank import TemplateBank
+from value_predictor import ValuePredictor
+from recognizers import TemplateRecognizer, CnnRecognizer, OcrRecognizer
+from tflite_engine import TFLiteModel
+from numpy_cnn import NumpyCNN
+from opencv_dnn_engine import OpenCVDnnModel
+from tesseract_api import create_ocr_engine
+from ocr_pool import TesseractPool
 from PIL import Image
 from segment_digits import ai_helper
-import tensorflow as tf
-from enumerations import EngineType
+from enumerations import EngineType, FrameQuality
 from pathlib import Path
-from gpiozero import Button, OutputDevice
+from gpiozero import Button, OutputDevice, Device
+from gpiozero.pins.mock import MockFactory
 from settings import SettingsDialog
 import subprocess
 import time
 from navicatEncrypt import NavicatCrypto
+from simulated_camera import QSimPicamera2
+
+try:
+    from qglpicamera2_wrapper import QGlPicamera2
+    from libcamera import controls
+except ImportError:
+    # Off the Pi only the simulated camera backend (--simulate) is available
+    QGlPicamera2 = None
+    controls = None
 
 
 # ───── Configuration ─────
@@ -39,9 +69,9 @@ IMG_DIR.mkdir(parents=True, exist_ok=True)
 
 # ----- Main class -----
 class MainWindow(QtWidgets.QMainWindow):
-    gpio_triggered = Signal()
+    gpio_triggered = Signal(object)
 
-    def __init__(self):
+    def __init__(self, simulate=None, sim_fps=30.0, trigger_hz=0.0, sim_focus=None):
         super().__init__()
 
         self.ui = Ui_MainWindow()
@@ -55,8 +85,19 @@ class MainWindow(QtWidgets.QMainWindow):
         self._ocr_thread = {}
         self._ocr_thread_busy = {}
         self._ai_thread = {}
+        self._ai_thread_busy = {}
+        self._template_thread = {}
+        self._template_thread_busy = {}
+        self._cascade_thread = {}
+        self._cascade_thread_busy = {}
         self._image_thread = {}
         self._image_thread_busy = {}
+        self._pair_thread = None
+        self._pending_pairs = deque()
+        self._coordinator = None
+        self._focus_thread = {}
+        self._tracker = {}
+        self._tracker_roi = {}
         self._capturing = False
         self._captured_digits = {}
         self._captured = 0
@@ -64,6 +105,12 @@ class MainWindow(QtWidgets.QMainWindow):
 
         self._navicat_crypto = NavicatCrypto()
 
+        # Simulation replays an image folder or video file instead of the cameras
+        self._simulate = simulate
+        self._sim_fps = sim_fps
+        self._sim_focus = sim_focus
+        self._trigger_hz = trigger_hz
+
         # Load settings
         settings = QSettings("CMBSolutions", "RpiCameraComparer")
         self._lens_pos = [float(settings.value(f"lensposition/{i}", 0.0)) for i in (0, 1)]
@@ -74,13 +121,67 @@ class MainWindow(QtWidgets.QMainWindow):
         self._password = self._navicat_crypto.DecryptString(settings.value("password", "", type=str))
         self._audio = settings.value("audio", True, type=bool)
         self._fullscreen = settings.value("fullscreen", True, type=bool)
+        self._ring_size = settings.value("ringsize", 8, type=int)
+        self._trigger_offset_ms = settings.value("triggeroffset", 0.0, type=float)
+        # 0 derives the pairing tolerance from the frame period (half of it), set it lower for synced sensors
+        self._capture_tolerance_ms = settings.value("capturetolerance", 0.0, type=float)
+        self._camera_fps = settings.value("camerafps", 30.0, type=float)
+        self._quality_gate = settings.value("quality/enabled", True, type=bool)
+        self._min_sharpness = settings.value("quality/minsharpness", 20.0, type=float)
+        self._min_contrast = settings.value("quality/mincontrast", 40.0, type=float)
+        self._max_motion = settings.value("quality/maxmotion", 0.25, type=float)
+        self._clip_high = settings.value("quality/cliphigh", 250, type=int)
+        self._clip_low = settings.value("quality/cliplow", 5, type=int)
+        # Derive sharpness, contrast and motion thresholds from the saved captures when there are enough
+        self._quality_calibrate = settings.value("quality/calibrate", True, type=bool)
+        self._quality_retries = settings.value("quality/retries", 2, type=int)
+        self._stop_on_unreadable = settings.value("quality/stoponunreadable", False, type=bool)
+        self._overlay_style = settings.value("overlay/style", "fill", type=str)
+        self._tracking = settings.value("tracking/enabled", False, type=bool)
+        self._tracking_scale = settings.value("tracking/scale", 0.5, type=float)
+        self._tracking_min_score = settings.value("tracking/minscore", 0.5, type=float)
+        self._ocr_backend = settings.value("ocr/backend", "api", type=str)
+        self._ocr_workers = settings.value("ocr/workers", 0, type=int)
+        self._ocr_stitched = settings.value("ocr/stitched", False, type=bool)
+        self._ocr_expected_len = settings.value("ocr/expectedlength", 0, type=int)
+        self._preprocess_stages = [s for s in settings.value("preprocess/stages", "", type=str).split(",") if s]
+        self._preprocess_scale = settings.value("preprocess/scale", 2.0, type=float)
+        self._cache_enabled = settings.value("cache/enabled", False, type=bool)
+        self._cache_size = settings.value("cache/size", 64, type=int)
+        self._cache_max_distance = settings.value("cache/maxdistance", 4, type=int)
+        self._glyph_cache_size = settings.value("ai/glyphcache", 256, type=int)
+        self._glyph_cache_distance = settings.value("ai/glyphcachedistance", 48, type=int)
+        self._template_product = settings.value("templates/product", "default", type=str)
+        self._template_min_score = settings.value("templates/minscore", 0.7, type=float)
+        self._verify_mode = settings.value("verify/mode", "off", type=str)
+        self._verify_joblist = settings.value("verify/joblist", "", type=str)
+        self._similarity_match = settings.value("similarity/match", 0.9, type=float)
+        self._similarity_mismatch = settings.value("similarity/mismatch", 0.3, type=float)
+        self._similarity_fallback = settings.value("similarity/fallback", EngineType.PYTESSERACT_OCR.value, type=str)
+        # The fallback recognises the frames that differ, so it has to be a recognition engine
+        if self._similarity_fallback not in {e.value for e in EngineType} - {EngineType.IMAGE_SIMILARITY.value}:
+            print(f"similarity/fallback {self._similarity_fallback!r} is not a recognition engine, "
+                  f"using {EngineType.PYTESSERACT_OCR.value}")
+            self._similarity_fallback = EngineType.PYTESSERACT_OCR.value
+        self._cascade_stages = [s for s in settings.value("cascade/stages", "template,ai,ocr", type=str).split(",") if s]
+        self._ai_min_confidence = settings.value("ai/minconfidence", 0.9, type=float)
+        self._ocr_min_confidence = settings.value("ocr/minconfidence", 0.6, type=float)
+        # int8 is experimental: it read 17 of 300 test strings differently from the Keras model, fp16 1 of 300
+        self._tflite_variant = settings.value("tflite/variant", "fp16", type=str)
+        self._ai_runtime = settings.value("ai/runtime", "auto", type=str)
+        self._dnn_threads = settings.value("dnn/threads", 4, type=int)
+        self._tflite_threads = settings.value("tflite/threads", 4, type=int)
 
         #metrics
         self._speed = 0.0
+        self._skew_ms = 0.0
         self._matchcount = 0
         self._matchcountTotal = settings.value("matchcounttotal", 0, type=int)
         self._errorcount = 0
         self._errorcountTotal = settings.value("errorcounttotal", 0, type=int)
+        # Frames skipped by the quality gate, these are not mismatches
+        self._unreadablecount = 0
+        self._unreadablecountTotal = settings.value("unreadablecounttotal", 0, type=int)
         self._last_time = None
         self.UpdateMetrics()
 
@@ -90,12 +191,44 @@ class MainWindow(QtWidgets.QMainWindow):
         self._alarmsound.setLoopCount(1)
         self._alarmsound.setVolume(1)
 
-         # This is the AI model, we load it here instead of in the ai thread because it is large and we want to avoid loading it multiple times
-        self._model = tf.keras.models.load_model("ai_model/digit_cnn_model7.keras")
-        
+        # The engines are loaded in the background once the cameras run (LoadEngines), and only the
+        # ones the selected engine needs. Until then capturing is held back.
+        self._ocr_engine = None
+        self._ocr_stitch_engine = None
+        self._model = None
+        self._tflite_model = None
+        self._dnn_model = None
+        self._template_bank = None
+        self._calibrated_gate = None
+        self._engine_ready = False
+        self._start_when_ready = False
+        self._load_thread = None
+        self._load_pending = False
+        self._engine_attr = {}
+        self._ocr_health_timer = None
+        self._stitch_thread = None
+        self._similarity_thread = None
+        # Per camera, so every camera keeps its own preallocated buffers
+        self._preprocess = {idx: PreprocessPipeline(self._preprocess_stages, scale=self._preprocess_scale) for idx in (0, 1)}
+
+        # The printed code stays the same for many packages, a ROI that hashes (nearly) the same as a
+        # recent one gets the stored result instead of a new recognition. Per camera, so one camera's
+        # result never stands in for the other's.
+        self._result_cache = {idx: RecognitionCache(self._cache_size, self._cache_max_distance) for idx in (0, 1)}
+        self._cache_key = {}
+        # Digit level cache for the AI engine, shared by both cameras since a glyph reads the same on either.
+        # A near glyph is confirmed with the template bank, so the cache needs the templates loaded.
+        self._glyph_cache = RecognitionCache(self._glyph_cache_size, max_distance=self._glyph_cache_distance,
+                                             hash_size=(24, 24)) if self._glyph_cache_size > 0 else None
+
+        # Verification mode: only check that the ROI shows the predicted value, recognise when it does not
+        self._predictor = {idx: ValuePredictor(self._verify_mode, self._verify_joblist) for idx in (0, 1)}
+
         self.gpio_triggered.connect(self.onGpioTriggered)
 
-        # Setup GPIO
+        # Setup GPIO, simulation drives mock pins instead of the real header
+        if self._simulate is not None:
+            Device.pin_factory = MockFactory()
         self.gpiotrigger = Button(TRIGGER_PIN, pull_up=True, bounce_time=0.05)
         self.gpiooutput = OutputDevice(OUTPUT_PIN)
         self.gpiooutput.on()
@@ -123,7 +256,12 @@ class MainWindow(QtWidgets.QMainWindow):
             parent = placeholder.parentWidget()
 
             # This is not the default QGlPicamera2 class, it is an overridden one that adds selecting regions
-            camw = QGlPicamera2(parent=parent, width=640, height=480, keep_ar=True, camid=idx)
+            if self._simulate is not None:
+                camw = QSimPicamera2(self._simulate, parent=parent, width=640, height=480, keep_ar=True, camid=idx,
+                                     ring_size=self._ring_size, fps=self._sim_fps, focus=self._sim_focus)
+            else:
+                camw = QGlPicamera2(parent=parent, width=640, height=480, keep_ar=True, camid=idx, ring_size=self._ring_size,
+                                    fps=self._camera_fps)
             camw.setObjectName(placeholder.objectName())
 
             grid.addWidget(camw, row, col, rowspan, colspan)
@@ -133,14 +271,18 @@ class MainWindow(QtWidgets.QMainWindow):
             camw.picam2.start(show_preview=True)  
  
             self._ocr_thread_busy[idx] = False
+            self._ai_thread_busy[idx] = False
+            self._template_thread_busy[idx] = False
+            self._cascade_thread_busy[idx] = False
             self._image_thread_busy[idx] = False
 
             # Check if there is AfMode available on the camera
             available = camw.picam2.camera_controls.keys()
 
-            if "AfMode" in available and "LensPosition" in available:
+            if "LensPosition" in available:
                 self._focus_supported[idx] = True
-                camw.picam2.set_controls({"AfMode": controls.AfModeEnum.Manual})
+                if "AfMode" in available:
+                    camw.picam2.set_controls({"AfMode": controls.AfModeEnum.Manual})
                 mn, mx, df = camw.picam2.camera_controls["LensPosition"]
                 
                 if self._lens_pos[idx] != df:
@@ -158,14 +300,47 @@ class MainWindow(QtWidgets.QMainWindow):
 
                 getattr(self.ui, f"Cam{idx}FocusPlus").setEnabled(False)
                 getattr(self.ui, f"Cam{idx}FocusMinus").setEnabled(False)
+                getattr(self.ui, f"Cam{idx}AutoFocus").setEnabled(False)
 
+        for idx in (0, 1):
+            getattr(self.ui, f"Cam{idx}Source").set_overlay_style(self._overlay_style)
         self.LoadCamRoi()
 
+        # Flashes the ROIs red while the machine is stopped on an error
+        self._flash_on = False
+        self._flash_timer = QtCore.QTimer(self)
+        self._flash_timer.timeout.connect(self.FlashRoiError)
+
+        # The configured thresholds until the calibrated gate is loaded with the engines
+        self._coordinator = CaptureCoordinator(
+            [getattr(self.ui, f"Cam{idx}Source") for idx in (0, 1)],
+            tolerance_ms=self._capture_tolerance_ms,
+            gate=self.ConfiguredQualityGate() if self._quality_gate else None,
+            retries=self._quality_retries,
+        )
+
+        # Simulated trigger: pulse the mock trigger pin so the normal GPIO path is exercised
+        if self._simulate is not None and self._trigger_hz > 0:
+            self._sim_trigger_timer = QtCore.QTimer(self)
+            self._sim_trigger_timer.timeout.connect(self.SimulateTrigger)
+            self._sim_trigger_timer.start(int(1000 / self._trigger_hz))
+            if not self._capturing:
+                self.StartCapturing()
+
+        # Cameras and previews are up, now load the engines
+        self.LoadEngines()
+
+
+    def SimulateTrigger(self):
+        pin = self.gpiotrigger.pin
+        pin.drive_low()
+        pin.drive_high()
+
 # ROI stuff
     def ResetCamRoi(self, checked: bool):
         cam_index = int(self.sender().objectName()[3])
         widget = getattr(self.ui, f"Cam{cam_index}Source")
-        widget.set_overlay(None)
+        widget.hide_overlay()
 
 
     def LoadCamRoi(self):
@@ -214,59 +389,473 @@ class MainWindow(QtWidgets.QMainWindow):
         getattr(self.ui, f"Cam{cam_idx}Source").picam2.set_controls({"LensPosition": pos})
 
 
+    def CamAutoFocus(self, checked: bool):
+        cam_idx = int(self.sender().objectName()[3])
+        if self._capturing or not self._focus_supported.get(cam_idx):
+            return
+
+        getattr(self.ui, f"Cam{cam_idx}AutoFocus").setEnabled(False)
+        t = RunFocusThread(getattr(self.ui, f"Cam{cam_idx}Source"), cam_idx)
+        t.setParent(self)
+        t.focus_found.connect(self.FocusFound)
+        t.finished.connect(t.deleteLater)
+        self._focus_thread[cam_idx] = t
+        t.start()
+
+
+    def FocusFound(self, cam_idx, pos, score):
+        self._lens_pos[cam_idx] = pos
+        getattr(self.ui, f"Cam{cam_idx}Source").picam2.set_controls({"LensPosition": pos})
+
+        # Don't let the slider round the position to its 0.1 steps
+        slider = getattr(self.ui, f"Cam{cam_idx}Slider")
+        slider.blockSignals(True)
+        slider.setValue(int(pos*10))
+        slider.blockSignals(False)
+        getattr(self.ui, f"Cam{cam_idx}AutoFocus").setEnabled(True)
+
+        settings = QSettings("CMBSolutions", "RpiCameraComparer")
+        settings.setValue(f"lensposition/{cam_idx}", pos)
+
+
  # Capture controls   
     def TestCam(self, checked: bool):
+        if not self._engine_ready:
+            return
         cam_idx = int(self.sender().objectName()[3])
         self._captured = 0
 
         widget = getattr(self.ui, f"Cam{cam_idx}Source")
+        gray, _ = widget.capture_roi_at(time.monotonic_ns(), timeout=0)
+        if gray is None:
+            # The ring was just reset (new ROI), nothing to read yet
+            getattr(self.ui, f"Cam{cam_idx}CapturedValue").setText(f"CAM{cam_idx}: no frame yet")
+            return
+        self.StartRecognition(cam_idx, gray)
+
+
+    def TrackRoi(self, cam_idx, gray):
+        # The operator ROI is the search window, the engines only get the tight ROI around the digits
+        widget = getattr(self.ui, f"Cam{cam_idx}Source")
+        roi = widget.GetRoi()
+
+        tracker = self._tracker.get(cam_idx)
+        if tracker is None or self._tracker_roi.get(cam_idx) != roi:
+            tracker = self._tracker[cam_idx] = RoiTracker(scale=self._tracking_scale, min_score=self._tracking_min_score)
+            self._tracker_roi[cam_idx] = roi
+        if not tracker.has_reference():
+            tracker.set_reference(gray)
+
+        crop, (x1, y1, x2, y2), score = tracker.track(gray)
+        if roi is not None:
+            ox, oy = roi[0], roi[1]
+            widget.set_extra_roi("tracked", (x1 + ox, y1 + oy, x2 + ox, y2 + oy), (0, 0, 255, 128))
+        return crop
+
+
+    def CachedRecognition(self, cam_idx, gray):
+        # Reports a cache hit straight away, on a miss the key is kept so digits_captured can store the result
+        self._cache_key[cam_idx] = None
+        if not self._cache_enabled:
+            return False
+
+        # An identical print is a hit. A near one could be a different number (a 6 for an 8 barely moves
+        # the hash), so it is only trusted when every glyph matches the templates of the cached string.
+        cache = self._result_cache[cam_idx]
+        key = cache.key(gray)
+        verify = (lambda text: self.TemplatesConfirm(gray, text)[0]) if self._template_bank is not None else None
+        hit = cache.get(key, verify)
+        if hit is None:
+            self._cache_key[cam_idx] = key
+            return False
+
+        print(f"Cam{cam_idx} cache hit: {cache.stats()}")
+        self.digits_captured(gray, cam_idx, hit[0], hit[1])
+        return True
+
+
+    def VerifyExpected(self, cam_idx, gray):
+        # One correlation against the templates of the predicted string, instead of a full recognition
+        if self._verify_mode == "off" or self._template_bank is None:
+            return False
+        expected = self._predictor[cam_idx].predict()
+        if expected is None:
+            return False
+
+        ok, scores = self.TemplatesConfirm(gray, expected)
+        if not ok:
+            print(f"Cam{cam_idx} is not the expected {expected}, recognising")
+            return False
+
+        self.digits_captured(gray, cam_idx, expected, scores.tolist())
+        return True
+
+
+    def TemplatesConfirm(self, gray, expected):
+        # The verdict and the template score of every expected digit
+        segments = ai_helper.segment_digits(self, gray)
+        return self._template_bank.verify([digit_img for _, _, digit_img in segments], expected,
+                                          self._template_min_score)
+
+
+    def StartRecognition(self, cam_idx, gray, track=True):
+        if not self._engine_ready:
+            # The engine was switched and is not loaded yet
+            return
+        if self._tracking and track:
+            gray = self.TrackRoi(cam_idx, gray)
+        if self.CachedRecognition(cam_idx, gray) or self.VerifyExpected(cam_idx, gray):
+            return
+        self.StartEngine(cam_idx, gray)
 
-        match self._engine:
+
+    def StartEngine(self, cam_idx, gray):
+        # The similarity engine has no reading of its own, uncertain pairs are read by its fallback
+        engine = self._similarity_fallback if self._engine == EngineType.IMAGE_SIMILARITY.value else self._engine
+        match engine:
             case EngineType.AI_MODEL.value:
-                    if self._ai_thread_busy[cam_idx]:
-                        prev = self._ai_thread.get(cam_idx)
+                    self.StartAI({cam_idx: gray})
+            case EngineType.AI_MODEL_TFLITE.value:
+                    self.StartAI({cam_idx: gray}, self._tflite_model)
+            case EngineType.AI_MODEL_OPENCV.value:
+                    self.StartAI({cam_idx: gray}, self._dnn_model)
+            case EngineType.TEMPLATE_MATCH.value:
+                    if self._template_thread_busy[cam_idx]:
+                        prev = self._template_thread.get(cam_idx)
                         if prev and prev.isRunning():
                             if not prev.wait(50):
                                 return
 
-                    self._ai_thread_busy[cam_idx] = True
-                    t = RunAIThread(widget)
+                    self._template_thread_busy[cam_idx] = True
+                    t = RunTemplateThread(gray, cam_idx, self._template_bank)
                     t.setParent(self)
-                    t.ai_captured_result.connect(self.digits_captured)
+                    t.template_captured_result.connect(self.TemplateCaptured)
                     t.finished.connect(t.deleteLater)
-                    self._ai_thread[cam_idx] = t
+                    self._template_thread[cam_idx] = t
                     t.start()
-            case EngineType.PYTESSERACT_OCR.value:
-                    if self._ocr_thread_busy[cam_idx]:
-                        prev = self._ocr_thread.get(cam_idx)
+            case EngineType.CASCADE.value:
+                    if self._cascade_thread_busy[cam_idx]:
+                        prev = self._cascade_thread.get(cam_idx)
                         if prev and prev.isRunning():
                             if not prev.wait(50):
                                 return
 
-                    self._ocr_thread_busy[cam_idx] = True
-                    t = RunOCRThread(widget)
+                    self._cascade_thread_busy[cam_idx] = True
+                    t = RunCascadeThread(gray, cam_idx, self.CascadeStages(cam_idx), self._ocr_expected_len)
                     t.setParent(self)
-                    t.ocr_captured_result.connect(self.digits_captured)
+                    t.cascade_captured_result.connect(self.digits_captured)
                     t.finished.connect(t.deleteLater)
-                    self._ocr_thread[cam_idx] = t
+                    self._cascade_thread[cam_idx] = t
                     t.start()
+            case EngineType.PYTESSERACT_OCR.value:
+                    self.StartOCR(cam_idx, gray)
+
+
+    def CascadeStages(self, cam_idx):
+        # Cheapest first, every stage with the confidence its digits need to end the cascade
+        stages = []
+        for name in self._cascade_stages:
+            match name:
+                case "template" if self._template_bank is not None and len(self._template_bank):
+                    stages.append((TemplateRecognizer(self._template_bank), self._template_min_score))
+                case "ai":
+                    stages.append((CnnRecognizer(self._model, self._glyph_cache, self._template_bank, self._template_min_score), self._ai_min_confidence))
+                case "ocr":
+                    stages.append((OcrRecognizer(self._ocr_engine[cam_idx], self._preprocess[cam_idx], self._ocr_expected_len),
+                                   self._ocr_min_confidence))
+        return stages
+
+
+    def StartAI(self, grays, model=None):
+        # One thread, and one forward pass, for the ROIs of all cameras in grays
+        for cam_idx in grays:
+            if self._ai_thread_busy[cam_idx]:
+                prev = self._ai_thread.get(cam_idx)
+                if prev and prev.isRunning():
+                    if not prev.wait(50):
+                        return
+
+        t = RunAIThread(grays, model or self._model, self._glyph_cache, self._template_bank, self._template_min_score)
+        t.setParent(self)
+        t.ai_captured_result.connect(self.digits_captured)
+        t.finished.connect(t.deleteLater)
+        for cam_idx in grays:
+            self._ai_thread_busy[cam_idx] = True
+            self._ai_thread[cam_idx] = t
+        t.start()
+
+
+    def StartBatchedAI(self, frames, model=None):
+        if self._tracking:
+            frames = tuple(self.TrackRoi(cam_idx, gray) for cam_idx, gray in enumerate(frames))
+
+        missed = {cam_idx: frames[cam_idx] for cam_idx in (0, 1)
+                  if not (self.CachedRecognition(cam_idx, frames[cam_idx]) or self.VerifyExpected(cam_idx, frames[cam_idx]))}
+        if missed:
+            self.StartAI(missed, model)
+
+
+    def StartOCR(self, cam_idx, gray):
+        if self._ocr_thread_busy[cam_idx]:
+            prev = self._ocr_thread.get(cam_idx)
+            if prev and prev.isRunning():
+                if not prev.wait(50):
+                    return
+
+        self._ocr_thread_busy[cam_idx] = True
+        t = RunOCRThread(gray, cam_idx, self._ocr_engine[cam_idx], self._preprocess[cam_idx], self._ocr_expected_len)
+        t.setParent(self)
+        t.ocr_captured_result.connect(self.digits_captured)
+        t.finished.connect(t.deleteLater)
+        self._ocr_thread[cam_idx] = t
+        t.start()
+
+
+    def TemplateCaptured(self, gray, cam_idx, digits, scores):
+        self._template_thread_busy[cam_idx] = False
+
+        # A digit that does not look enough like any template goes to tesseract instead
+        wrong_len = self._ocr_expected_len > 0 and len(digits) != self._ocr_expected_len
+        if len(scores) == 0 or wrong_len or scores.min() < self._template_min_score:
+            print(f"Template Cam{cam_idx} low confidence ({digits}, {scores.round(2).tolist()}), escalating to OCR")
+            self.StartOCR(cam_idx, gray)
+            return
+        self.digits_captured(gray, cam_idx, digits, scores.tolist())
+
+
+    def LoadModel(self):
+        # The NumPy runtime needs the weights exported by ai_model/export_npz.py, but no TensorFlow import
+        npz = Path("ai_model/digit_cnn_model7.npz")
+        if self._ai_runtime == "numpy" or (self._ai_runtime == "auto" and npz.exists()):
+            print(f"AI model: NumPy runtime ({npz})")
+            return NumpyCNN(npz)
+
+        import tensorflow as tf
+        print("AI model: Keras")
+        return tf.keras.models.load_model("ai_model/digit_cnn_model7.keras")
+
+
+    def EngineNeeds(self, engine=None):
+        # What has to be loaded for an engine, nothing else ever gets imported or loaded
+        needs = set()
+        match engine or self._engine:
+            case EngineType.PYTESSERACT_OCR.value:
+                needs.add("ocr")
+                if self._ocr_stitched:
+                    needs.add("stitch")
+            case EngineType.AI_MODEL.value:
+                needs.add("model")
+            case EngineType.AI_MODEL_TFLITE.value:
+                needs.add("tflite")
+            case EngineType.AI_MODEL_OPENCV.value:
+                needs.add("dnn")
+            case EngineType.TEMPLATE_MATCH.value:
+                # Low confidence reads escalate to tesseract
+                needs.update(("templates", "ocr"))
+            case EngineType.IMAGE_SIMILARITY.value:
+                needs.update(self.EngineNeeds(self._similarity_fallback))
+            case EngineType.CASCADE.value:
+                stage_needs = {"template": "templates", "ai": "model", "ocr": "ocr"}
+                needs.update(stage_needs[stage] for stage in self._cascade_stages if stage in stage_needs)
+        # Template verification, and the caches confirm their near hits with the templates
+        if self._verify_mode != "off" or self._cache_enabled:
+            needs.add("templates")
+        if self._glyph_cache is not None and needs & {"model", "tflite", "dnn"}:
+            needs.add("templates")
+        # Calibrating the quality gate reads the recent captures
+        if self._quality_gate and self._quality_calibrate:
+            needs.add("gate")
+        return needs
+
+
+    def LoadEngines(self):
+        loaders = {
+            "ocr": (self.LoadOcrEngines, "_ocr_engine"),
+            # Stitched mode reads both ROIs as two lines of one image, which needs the multi-line page mode
+            "stitch": (lambda: create_ocr_engine(psm=6), "_ocr_stitch_engine"),
+            "model": (self.LoadModel, "_model"),
+            "tflite": (self.LoadTFLite, "_tflite_model"),
+            "dnn": (self.LoadDnn, "_dnn_model"),
+            "templates": (self.LoadTemplateBank, "_template_bank"),
+            "gate": (self.LoadQualityGate, "_calibrated_gate"),
+        }
+        missing = {name: loaders[name][0] for name in self.EngineNeeds() if getattr(self, loaders[name][1]) is None}
+        self._engine_attr = {name: attr for name, (_, attr) in loaders.items()}
+
+        if not missing:
+            self.SetEngineReady(True)
+            return
+        if self._load_thread is not None and self._load_thread.isRunning():
+            # Loading already, pick up the rest when it is done
+            self._load_pending = True
+            return
+
+        self.SetEngineReady(False)
+        self._load_pending = False
+        self._load_started = time.perf_counter()
+        t = RunEngineLoadThread(missing)
+        t.setParent(self)
+        t.engines_loaded.connect(self.EnginesLoaded)
+        t.finished.connect(t.deleteLater)
+        self._load_thread = t
+        t.start()
+
+
+    def EnginesLoaded(self, loaded, errors):
+        self._load_thread = None
+        for name, engine in loaded.items():
+            setattr(self, self._engine_attr[name], engine)
+        print(f"Engines {', '.join(loaded) or '-'} loaded in {time.perf_counter() - self._load_started:.1f} s")
+
+        # The pool's health check timer has to live in the GUI thread
+        if "ocr" in loaded and self._ocr_backend == "pool" and self._ocr_health_timer is None:
+            self._ocr_health_timer = QtCore.QTimer(self)
+            self._ocr_health_timer.timeout.connect(self._ocr_engine[0].check)
+            self._ocr_health_timer.start(10000)
+
+        if "gate" in loaded:
+            self._coordinator.set_gate(self._calibrated_gate)
+
+        for name, error in errors.items():
+            print(f"Loading {name} failed: {error}")
+
+        # Settings changed while loading, load for those (retrying what failed if it is still needed)
+        if self._load_pending:
+            self.LoadEngines()
+            return
+
+        if errors:
+            for cam_idx in (0, 1):
+                getattr(self.ui, f"Cam{cam_idx}CapturedValue").setText(f"CAM{cam_idx}: engine failed to load")
+            return
+        self.SetEngineReady(True)
+
+
+    def SetEngineReady(self, ready):
+        # Capturing and test reads wait for the selected engine
+        self._engine_ready = ready
+        # A running capture can always be stopped
+        self.ui.StartCapture.setEnabled(ready or self._capturing)
+        self.ui.bTriggerManual.setEnabled(ready and not self._halt)
+        self.ui.Cam0TestCapture.setEnabled(ready and not self._halt)
+        self.ui.Cam1TestCapture.setEnabled(ready and not self._halt)
+
+        if not ready:
+            for cam_idx in (0, 1):
+                getattr(self.ui, f"Cam{cam_idx}CapturedValue").setText(f"CAM{cam_idx}: loading engine...")
+            return
+
+        for cam_idx in (0, 1):
+            getattr(self.ui, f"Cam{cam_idx}CapturedValue").setText(f"CAM{cam_idx}: ready")
+        if self._start_when_ready:
+            self._start_when_ready = False
+            if not self._capturing:
+                self.StartCapturing()
+
+
+    def LoadOcrEngines(self):
+        # One resident tesseract engine per camera, so the traineddata is loaded once and not per read.
+        # The pool backend shares single threaded worker processes (one per core) between both cameras.
+        if self._ocr_backend == "pool":
+            try:
+                pool = TesseractPool(workers=self._ocr_workers, psm=7)
+                return {idx: pool for idx in (0, 1)}
+            except OSError as e:
+                print(f"WARNING: tesseract pool unavailable ({e}), falling back to one engine per camera")
+                self._ocr_backend = "api"
+        return {idx: create_ocr_engine(psm=7) for idx in (0, 1)}
+
+
+    def LoadTFLite(self):
+        # The converted model (ai_model/convert_tflite.py)
+        if self._tflite_variant == "int8":
+            print("WARNING: the int8 TFLite model is experimental, check it with Tests/tflite_tests.py first")
+        return TFLiteModel(f"ai_model/digit_cnn_model7_{self._tflite_variant}.tflite", self._tflite_threads)
+
+
+    def LoadDnn(self):
+        # The ONNX export (ai_model/export_onnx.py)
+        return OpenCVDnnModel("ai_model/digit_cnn_model7.onnx", self._dnn_threads)
+
+
+    def LoadTemplateBank(self):
+        # One bank per product, built from the labelled captures the first time
+        path = BASE / "templates" / f"{self._template_product}.npz"
+        if path.exists():
+            bank = TemplateBank.load(path)
+        else:
+            bank = TemplateBank.build(IMG_DIR.glob("*.png"))
+            if len(bank):
+                bank.save(path)
+        print(f"Template bank {self._template_product}: {len(bank)} templates")
+        return bank
+
+
+    def ConfiguredQualityGate(self):
+        return QualityGate(min_sharpness=self._min_sharpness, min_contrast=self._min_contrast,
+                           max_motion=self._max_motion, clip_high=self._clip_high, clip_low=self._clip_low)
+
+
+    def LoadQualityGate(self):
+        # Thresholds from the recent captures, the configured ones when there are too few of them
+        gate = QualityGate.calibrate(IMG_DIR.glob("*.png"), clip_high=self._clip_high, clip_low=self._clip_low)
+        if gate is None:
+            gate = self.ConfiguredQualityGate()
+        print(f"Quality gate: sharpness >= {gate.min_sharpness:.0f}, contrast >= {gate.min_contrast:.0f}, "
+              f"motion <= {gate.max_motion:.2f}")
+        return gate
+
+
+    def StartStitchedRecognition(self, frames):
+        if self._tracking:
+            frames = tuple(self.TrackRoi(cam_idx, gray) for cam_idx, gray in enumerate(frames))
+
+        # Only worth a stitched read when neither camera is in the cache
+        missed = [cam_idx for cam_idx in (0, 1)
+                  if not (self.CachedRecognition(cam_idx, frames[cam_idx]) or self.VerifyExpected(cam_idx, frames[cam_idx]))]
+        if len(missed) < 2:
+            for cam_idx in missed:
+                self.StartEngine(cam_idx, frames[cam_idx])
+            return
+
+        prev = self._stitch_thread
+        if prev and prev.isRunning():
+            if not prev.wait(50):
+                return
+
+        for cam_idx in (0, 1):
+            self._ocr_thread_busy[cam_idx] = True
+        t = RunStitchedOCRThread(frames, self._ocr_stitch_engine, self._ocr_engine,
+                                 pipelines=self._preprocess, expected_len=self._ocr_expected_len)
+        t.setParent(self)
+        t.ocr_captured_result.connect(self.digits_captured)
+        t.finished.connect(t.deleteLater)
+        self._stitch_thread = t
+        t.start()
 
 
-    def digits_captured(self, rgb, cam_idx, digits):
+    def digits_captured(self, rgb, cam_idx, digits, confidences=None):
         if not self._halt:
             getattr(self.ui, f"Cam{cam_idx}CapturedValue").setText(f"CAM{cam_idx}: {digits}")
             self._captured_digits[cam_idx] = digits
+
+            self._predictor[cam_idx].observe(digits)
+
+            key = self._cache_key.pop(cam_idx, None)
+            if key is not None and digits:
+                self._result_cache[cam_idx].put(key, digits, confidences)
             self._captured += 1
             self._ocr_thread_busy[cam_idx] = False
+            self._ai_thread_busy[cam_idx] = False
+            self._template_thread_busy[cam_idx] = False
+            self._cascade_thread_busy[cam_idx] = False
 
         if self._captured >= 2:
-            if self._captured_digits[0] != self._captured_digits[1]:
+            # Two failed reads are not a match
+            if not self._captured_digits[0] or self._captured_digits[0] != self._captured_digits[1]:
                 self.onDigitsNotMatching()
             else:
-                self._matchcount += 1
-                self._matchcountTotal += 1
-                getattr(self.ui, "Frame_Error").setStyleSheet("color: green;")
-                getattr(self.ui, "Frame_Error").show()
+                self.onDigitsMatching()
 
         self.UpdateMetrics()
         
@@ -286,7 +875,20 @@ class MainWindow(QtWidgets.QMainWindow):
         self._image_thread_busy[cam_idx] = False
 
 
+    def onDigitsMatching(self):
+        self._matchcount += 1
+        self._matchcountTotal += 1
+        getattr(self.ui, "Frame_Error").setStyleSheet("color: green;")
+        getattr(self.ui, "Frame_Error").show()
+
+
     def onDigitsNotMatching(self):
+        self.HaltMachine()
+        self._errorcount += 1
+        self._errorcountTotal += 1
+
+
+    def HaltMachine(self):
         self.gpiooutput.off()
         self._halt = True
         getattr(self.ui, "Frame_Error").setStyleSheet("color: red;")
@@ -299,21 +901,26 @@ class MainWindow(QtWidgets.QMainWindow):
         if self._audio:
             self._alarmsound.play()
 
-        self._errorcount += 1
-        self._errorcountTotal += 1
+        self._flash_timer.start(400)
+
 
+    def FlashRoiError(self):
+        self._flash_on = not self._flash_on
+        for idx in (0, 1):
+            getattr(self.ui, f"Cam{idx}Source").set_status_colour(ROI_COLOUR_ERROR if self._flash_on else None)
 
 
     def handle_gpiotrigger(self):
-        self.gpio_triggered.emit()
+        # Timestamp the edge here, in the GPIO callback, before the Qt signal gets queued
+        self.gpio_triggered.emit(time.monotonic_ns())
 
 
-    def onGpioTriggered(self):
-        if self._capturing and not self._halt:
+    def onGpioTriggered(self, trigger_ns):
+        if self._capturing and not self._halt and self._engine_ready:
             self._captured = 0
             self.calculateSpeed()
 
-            self.CompareImages()
+            self.CompareImages(trigger_ns)
 
 
     def calculateSpeed(self):
@@ -330,54 +937,140 @@ class MainWindow(QtWidgets.QMainWindow):
 
 
     def StartCapturing(self):
+        if not self._capturing and not self._engine_ready:
+            self._start_when_ready = True
+            return
+
         if self._capturing:
             self._capturing = False
             getattr(self.ui, "StartCapture").setText("Start capture")
             getattr(self.ui, "StartCapture").setIcon(QIcon(":/main/gtk-media-play-ltr.png"))
+            self.ui.StartCapture.setEnabled(self._engine_ready)
+            self._pending_pairs.clear()
             self.ui.bStopMachine.setEnabled(True)
         else:
             self._capturing = True
             self._last_time = None
             self._matchcount = 0
             self._errorcount = 0
+            self._unreadablecount = 0
             getattr(self.ui, "StartCapture").setText("Stop capture")
             getattr(self.ui, "StartCapture").setIcon(QIcon(":/main/gtk-media-pause.png"))
             self.ui.bStopMachine.setEnabled(False)
 
 
-    def CompareImages(self):
+    def CompareImages(self, trigger_ns):
+        # Select the buffered frames closest to the trigger edge (plus offset) on both
+        # cameras, paired by SensorTimestamp, instead of capturing from inside the threads.
+        frame_ns = trigger_ns + int(self._trigger_offset_ms * 1_000_000)
+
+        # Never wait here, this is the thread that completes the camera requests and fills the rings.
+        # The rings hold the frames for a while, so the trigger is paired when the previous pair is done.
+        if self._pair_thread is not None:
+            self._pending_pairs.append(frame_ns)
+            return
+        self.StartPair(frame_ns)
+
+
+    def StartPair(self, frame_ns):
+        t = RunCaptureThread(self._coordinator, frame_ns)
+        t.setParent(self)
+        t.pair_captured.connect(self.PairCaptured)
+        t.finished.connect(t.deleteLater)
+        self._pair_thread = t
+        t.start()
+
+
+    def PairCaptured(self, frames, skew, quality):
+        self._pair_thread = None
+        self._skew_ms = skew / 1_000_000
+        if self._pending_pairs:
+            self.StartPair(self._pending_pairs.popleft())
+
+        if not self._engine_ready:
+            # Captured before a settings change, the new engine is still loading
+            print("Engine not ready, dropping captured pair")
+            return
+
+        # Skip recognition on frames that would only produce garbage or do not show the same moment
+        # (no frame, out of sync), and say why
+        unreadable = [cam_idx for cam_idx in (0, 1) if quality[cam_idx] != FrameQuality.OK]
+        if unreadable:
+            self._unreadablecount += 1
+            self._unreadablecountTotal += 1
+            for cam_idx in unreadable:
+                reason = quality[cam_idx].value
+                if quality[cam_idx] == FrameQuality.OUT_OF_SYNC:
+                    reason = f"{reason}, skew {self._skew_ms:.1f} ms"
+                print(f"Cam{cam_idx} unreadable: {reason} ({self._unreadablecount} this run)")
+                getattr(self.ui, f"Cam{cam_idx}CapturedValue").setText(
+                    f"CAM{cam_idx}: unreadable ({reason}), {self._unreadablecount} this run")
+            # Not a mismatch, only stop when asked to
+            if self._stop_on_unreadable:
+                self.HaltMachine()
+            self.UpdateMetrics()
+            return
+
+        if self._engine == EngineType.IMAGE_SIMILARITY.value:
+            self.StartSimilarity(frames)
+            return
+
+        if self._ocr_stitched and self._engine == EngineType.PYTESSERACT_OCR.value:
+            self.StartStitchedRecognition(frames)
+            return
+
+        if self._engine == EngineType.AI_MODEL.value:
+            self.StartBatchedAI(frames)
+            return
+        if self._engine == EngineType.AI_MODEL_TFLITE.value:
+            self.StartBatchedAI(frames, self._tflite_model)
+            return
+        if self._engine == EngineType.AI_MODEL_OPENCV.value:
+            self.StartBatchedAI(frames, self._dnn_model)
+            return
+
         for cam_idx in (0, 1):
-            widget = getattr(self.ui, f"Cam{cam_idx}Source")
+            self.StartRecognition(cam_idx, frames[cam_idx])
 
-            match self._engine:
-                case EngineType.AI_MODEL.value:
-                    if self._ai_thread_busy[cam_idx]:
-                        prev = self._ai_thread.get(cam_idx)
-                        if prev and prev.isRunning():
-                            if not prev.wait(50):
-                                return
 
-                    self._ai_thread_busy[cam_idx] = True
-                    t = RunAIThread(widget)
-                    t.setParent(self)
-                    t.ai_captured_result.connect(self.digits_captured)
-                    t.finished.connect(t.deleteLater)
-                    self._ai_thread[cam_idx] = t
-                    t.start()
-                case EngineType.PYTESSERACT_OCR.value:
-                    if self._ocr_thread_busy[cam_idx]:
-                        prev = self._ocr_thread.get(cam_idx)
-                        if prev and prev.isRunning():
-                            if not prev.wait(50):
-                                return
+    def StartSimilarity(self, frames):
+        if self._tracking:
+            frames = tuple(self.TrackRoi(cam_idx, gray) for cam_idx, gray in enumerate(frames))
+
+        prev = self._similarity_thread
+        if prev and prev.isRunning():
+            if not prev.wait(50):
+                return
+
+        t = RunSimilarityThread(frames)
+        t.setParent(self)
+        t.similarity_result.connect(self.SimilarityCompared)
+        t.finished.connect(t.deleteLater)
+        self._similarity_thread = t
+        t.start()
 
-                    self._ocr_thread_busy[cam_idx] = True
-                    t = RunOCRThread(widget)
-                    t.setParent(self)
-                    t.ocr_captured_result.connect(self.digits_captured)
-                    t.finished.connect(t.deleteLater)
-                    self._ocr_thread[cam_idx] = t
-                    t.start()
+
+    def SimilarityCompared(self, frames, score):
+        self._similarity_thread = None
+        if self._halt:
+            return
+
+        # Clearly the same print, or clearly not, is decided here. In between both cameras get read.
+        if score >= self._similarity_match:
+            for cam_idx in (0, 1):
+                getattr(self.ui, f"Cam{cam_idx}CapturedValue").setText(f"CAM{cam_idx}: same ({score:.2f})")
+            self.onDigitsMatching()
+            self.UpdateMetrics()
+        elif score <= self._similarity_mismatch:
+            for cam_idx in (0, 1):
+                getattr(self.ui, f"Cam{cam_idx}CapturedValue").setText(f"CAM{cam_idx}: different ({score:.2f})")
+            self.onDigitsNotMatching()
+            self.UpdateMetrics()
+        else:
+            print(f"Similarity {score:.2f} uncertain, recognising both cameras")
+            # The frames are already tracked
+            for cam_idx in (0, 1):
+                self.StartRecognition(cam_idx, frames[cam_idx], track=False)
 
 
     def ResetError(self):
@@ -385,9 +1078,13 @@ class MainWindow(QtWidgets.QMainWindow):
         self._halt = False
         getattr(self.ui, "Frame_Error").hide()
         getattr(self.ui, "ResetError").setEnabled(False)
-        self.ui.bTriggerManual.setEnabled(True)
-        self.ui.Cam0TestCapture.setEnabled(True)
-        self.ui.Cam1TestCapture.setEnabled(True)
+        self.ui.bTriggerManual.setEnabled(self._engine_ready)
+        self.ui.Cam0TestCapture.setEnabled(self._engine_ready)
+        self.ui.Cam1TestCapture.setEnabled(self._engine_ready)
+
+        self._flash_timer.stop()
+        for idx in (0, 1):
+            getattr(self.ui, f"Cam{idx}Source").set_status_colour(ROI_COLOUR)
 
     
     def StartStopMachineHandler(self):
@@ -479,6 +1176,14 @@ class MainWindow(QtWidgets.QMainWindow):
         self._is_locked = settings.value("is_locked", True)
         self._password = self._navicat_crypto.DecryptString(settings.value("password", "", type=str))
         self._audio = settings.value("audio", True, type=bool)
+        # Load whatever the newly selected engine needs, in the background
+        self.LoadEngines()
+
+        # Another engine may read the same ROI differently
+        for cache in self._result_cache.values():
+            cache.clear()
+        if self._glyph_cache is not None:
+            self._glyph_cache.clear()
 
 
     def SaveSettings(self):
@@ -493,6 +1198,7 @@ class MainWindow(QtWidgets.QMainWindow):
 
         settings.setValue("errorcounttotal", self._errorcountTotal)
         settings.setValue("matchcounttotal", self._matchcountTotal)
+        settings.setValue("unreadablecounttotal", self._unreadablecountTotal)
 
 
     def UnlockHandler(self):
@@ -534,6 +1240,18 @@ class MainWindow(QtWidgets.QMainWindow):
                 return
                 
         self.SaveSettings()
+        ocr_engines, stitch_engine = self._ocr_engine, self._ocr_stitch_engine
+        if self._load_thread is not None:
+            # A load cannot be interrupted, wait for it and close what it made but did not hand over yet
+            self._load_thread.wait()
+            ocr_engines = ocr_engines or self._load_thread.loaded.get("ocr")
+            stitch_engine = stitch_engine or self._load_thread.loaded.get("stitch")
+        if self._ocr_health_timer is not None:
+            self._ocr_health_timer.stop()
+        for engine in set((ocr_engines or {}).values()):
+            engine.close()
+        if stitch_engine is not None:
+            stitch_engine.close()
         super().closeEvent(event)
 
 
@@ -546,7 +1264,17 @@ class MainWindow(QtWidgets.QMainWindow):
 
 
 if __name__ == "__main__":
-    app = QtWidgets.QApplication(sys.argv)
-    window = MainWindow()
+    parser = argparse.ArgumentParser(description="Compare the numbers seen by two cameras.")
+    parser.add_argument("--simulate", metavar="SOURCE",
+                        help="replay an image folder or video file instead of using the cameras")
+    parser.add_argument("--fps", type=float, default=30.0, help="frame rate of the simulated cameras")
+    parser.add_argument("--trigger-hz", type=float, default=0.0,
+                        help="pulse the simulated trigger at this rate and start capturing")
+    parser.add_argument("--sim-focus", type=float, default=None, metavar="POSITION",
+                        help="blur the simulated cameras away from this LensPosition, to try the focus sweep")
+    args, qt_args = parser.parse_known_args()
+
+    app = QtWidgets.QApplication(sys.argv[:1] + qt_args)
+    window = MainWindow(simulate=args.simulate, sim_fps=args.fps, trigger_hz=args.trigger_hz, sim_focus=args.sim_focus)
     window.show()
     sys.exit(app.exec())
\ No newline at end of file
@@ -92,6 +92,9 @@ class Ui_MainWindow(object):
         self.Cam0TestCapture = QPushButton(self.centralwidget)
         self.Cam0TestCapture.setObjectName(u"Cam0TestCapture")
         self.Cam0TestCapture.setGeometry(QRect(340, 700, 151, 61))
+        self.Cam0AutoFocus = QPushButton(self.centralwidget)
+        self.Cam0AutoFocus.setObjectName(u"Cam0AutoFocus")
+        self.Cam0AutoFocus.setGeometry(QRect(520, 700, 151, 61))
         self.frame = QFrame(self.centralwidget)
         self.frame.setObjectName(u"frame")
         self.frame.setGeometry(QRect(20, 30, 940, 571))
@@ -193,6 +196,9 @@ class Ui_MainWindow(object):
         self.Cam1TestCapture = QPushButton(self.centralwidget)
         self.Cam1TestCapture.setObjectName(u"Cam1TestCapture")
         self.Cam1TestCapture.setGeometry(QRect(1290, 700, 151, 61))
+        self.Cam1AutoFocus = QPushButton(self.centralwidget)
+        self.Cam1AutoFocus.setObjectName(u"Cam1AutoFocus")
+        self.Cam1AutoFocus.setGeometry(QRect(1470, 700, 151, 61))
         self.Cam1FocusMinus = QPushButton(self.centralwidget)
         self.Cam1FocusMinus.setObjectName(u"Cam1FocusMinus")
         self.Cam1FocusMinus.setGeometry(QRect(1110, 640, 41, 41))
@@ -360,6 +366,8 @@ class Ui_MainWindow(object):
         self.Cam1ResetROI.raise_()
         self.Cam1FocusPlus.raise_()
         self.Cam1TestCapture.raise_()
+        self.Cam0AutoFocus.raise_()
+        self.Cam1AutoFocus.raise_()
         self.Cam1FocusMinus.raise_()
         self.Cam0Slider.raise_()
         self.Cam1Slider.raise_()
@@ -413,6 +421,8 @@ class Ui_MainWindow(object):
         self.actionRebootSystem.triggered.connect(MainWindow.RebootHandler)
         self.actionShutdownSystem.triggered.connect(MainWindow.ShutdownHandler)
         self.bStopMachine.clicked.connect(MainWindow.StartStopMachineHandler)
+        self.Cam0AutoFocus.clicked.connect(MainWindow.CamAutoFocus)
+        self.Cam1AutoFocus.clicked.connect(MainWindow.CamAutoFocus)
 
         QMetaObject.connectSlotsByName(MainWindow)
     # setupUi
@@ -440,6 +450,10 @@ class Ui_MainWindow(object):
         self.Cam0TestCapture.setToolTip(QCoreApplication.translate("MainWindow", u"Test the capture of Camera 1", None))
 #endif // QT_CONFIG(tooltip)
         self.Cam0TestCapture.setText(QCoreApplication.translate("MainWindow", u"Test capture", None))
+#if QT_CONFIG(tooltip)
+        self.Cam0AutoFocus.setToolTip(QCoreApplication.translate("MainWindow", u"Sweep the lens position and keep the sharpest ROI", None))
+#endif // QT_CONFIG(tooltip)
+        self.Cam0AutoFocus.setText(QCoreApplication.translate("MainWindow", u"Auto focus", None))
         self.Cam0CapturedValue.setText(QCoreApplication.translate("MainWindow", u"CAM0: 00000", None))
         self.Cam0Source.setText(QCoreApplication.translate("MainWindow", u"TextLabel", None))
         self.Cam1CapturedValue.setText(QCoreApplication.translate("MainWindow", u"CAM1: 00000", None))
@@ -456,6 +470,10 @@ class Ui_MainWindow(object):
         self.Cam1TestCapture.setToolTip(QCoreApplication.translate("MainWindow", u"Test the capture of Camera 1", None))
 #endif // QT_CONFIG(tooltip)
         self.Cam1TestCapture.setText(QCoreApplication.translate("MainWindow", u"Test capture", None))
+#if QT_CONFIG(tooltip)
+        self.Cam1AutoFocus.setToolTip(QCoreApplication.translate("MainWindow", u"Sweep the lens position and keep the sharpest ROI", None))
+#endif // QT_CONFIG(tooltip)
+        self.Cam1AutoFocus.setText(QCoreApplication.translate("MainWindow", u"Auto focus", None))
 #if QT_CONFIG(tooltip)
         self.Cam1FocusMinus.setToolTip(QCoreApplication.translate("MainWindow", u"Decrease focus distance", None))
 #endif // QT_CONFIG(tooltip)
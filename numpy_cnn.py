@@ -0,0 +1,82 @@
+import threading
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class NumpyCNN:
+    """The digit CNN (conv, max pool, flatten, dense) in plain NumPy, from the weights written by
+    ai_model/export_npz.py. Called like the Keras model: model(batch) -> softmax."""
+
+    def __init__(self, path):
+        with np.load(path) as data:
+            self._kinds = [str(k) for k in data["kinds"]]
+            self._activations = [str(a) for a in data["activations"]]
+            self._weights = {i: (data[f"w{i}"], data[f"b{i}"]) for i in range(len(self._kinds)) if f"w{i}" in data}
+        self._buffers = {}
+        self._batch = None
+        # The work buffers are shared, the camera threads take turns
+        self._lock = threading.Lock()
+
+
+    def __call__(self, batch, training=False):
+        x = np.asarray(batch, dtype=np.float32)
+        with self._lock:
+            if len(x) != self._batch:
+                self._buffers = {}
+                self._batch = len(x)
+
+            for i, kind in enumerate(self._kinds):
+                match kind:
+                    case "conv":
+                        w, b = self._weights[i]
+                        kh, kw = w.shape[:2]
+                        n, h, wd, _ = x.shape
+                        oh, ow = h - kh + 1, wd - kw + 1
+                        out = self._buffer(i, (n, oh, ow, w.shape[3]))
+                        # im2col: the windows (a strided view) copied into a (n, h', w', kh, kw, c) buffer in the
+                        # kernel's (kh, kw, c) order, then a single matrix product does the convolution
+                        cols = self._buffer(f"cols{i}", (n, oh, ow, kh, kw, x.shape[3]))
+                        np.copyto(cols, sliding_window_view(x, (kh, kw), axis=(1, 2)).transpose(0, 1, 2, 4, 5, 3))
+                        np.matmul(cols.reshape(n * oh * ow, -1), w.reshape(-1, w.shape[3]), out=out.reshape(n * oh * ow, -1))
+                        out += b
+                    case "pool":
+                        n, h, wd, c = x.shape
+                        out = self._buffer(i, (n, h // 2, wd // 2, c))
+                        x = x[:, :h // 2 * 2, :wd // 2 * 2].reshape(n, h // 2, 2, wd // 2, 2, c)
+                        np.max(x, axis=(2, 4), out=out)
+                    case "flatten":
+                        # Keras flattens NHWC row major, so does reshape
+                        out = x.reshape(len(x), -1)
+                    case "dense":
+                        w, b = self._weights[i]
+                        out = self._buffer(i, (len(x), w.shape[1]))
+                        np.dot(x, w, out=out)
+                        out += b
+                x = self._activate(out, self._activations[i])
+            return x.copy()
+
+
+    def predict(self, batch, verbose=0):
+        return self(batch)
+
+
+    def _buffer(self, i, shape):
+        buf = self._buffers.get(i)
+        if buf is None or buf.shape != shape:
+            buf = self._buffers[i] = np.empty(shape, dtype=np.float32)
+        return buf
+
+
+    def _activate(self, x, activation):
+        match activation:
+            case "relu":
+                np.maximum(x, 0, out=x)
+            case "softmax":
+                x -= x.max(axis=-1, keepdims=True)
+                np.exp(x, out=x)
+                x /= x.sum(axis=-1, keepdims=True)
+            case "linear":
+                pass
+            case _:
+                raise ValueError(f"Activation {activation} is not supported")
+        return x
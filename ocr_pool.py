@@ -0,0 +1,192 @@
+import json
+import os
+import queue
+import struct
+import subprocess
+import sys
+import threading
+import cv2
+import numpy as np
+from tesseract_api import _load_library
+
+# Request: height, width and payload length, followed by the bit packed binarized ROI.
+# A request with a zero size is a ping. Reply: payload length followed by the utf-8 JSON of
+# the text and the (character, confidence) of every symbol.
+REQUEST = struct.Struct("<HHI")
+REPLY = struct.Struct("<I")
+
+
+def _read_exact(stream, size):
+    data = stream.read(size)
+    if len(data) != size:
+        raise EOFError("tesseract worker closed its pipe")
+    return data
+
+
+class TesseractWorker:
+    """One resident tesseract process, fed binarized ROIs over its stdin."""
+
+    def __init__(self, psm=7, timeout=2.0, startup_timeout=20.0):
+        self._psm = psm
+        self._timeout = timeout
+        # Until it has answered once the worker may still be loading the traineddata (slow on a cold Pi)
+        self._startup_timeout = startup_timeout
+        self._warm = False
+        self._proc = None
+        self.start()
+
+
+    def start(self):
+        # Every worker is single threaded, the pool gives the parallelism
+        env = dict(os.environ, OMP_THREAD_LIMIT="1")
+        self._warm = False
+        self._proc = subprocess.Popen([sys.executable, os.path.abspath(__file__), str(self._psm)],
+                                      stdin=subprocess.PIPE, stdout=subprocess.PIPE, env=env)
+
+
+    def restart(self):
+        self.close()
+        self.start()
+
+
+    def alive(self):
+        return self._proc is not None and self._proc.poll() is None
+
+
+    def ping(self):
+        try:
+            self._request(0, 0, b"")
+            return True
+        except (OSError, EOFError):
+            return False
+
+
+    def recognize_with_confidence(self, binary):
+        h, w = binary.shape
+        reply = json.loads(self._request(h, w, np.packbits(binary > 0).tobytes()))
+        return reply["text"], [tuple(symbol) for symbol in reply["symbols"]]
+
+
+    def close(self):
+        if self._proc is None:
+            return
+        try:
+            self._proc.stdin.close()
+            self._proc.wait(timeout=1.0)
+        except (OSError, subprocess.TimeoutExpired):
+            self._proc.kill()
+            self._proc.wait()
+        self._proc = None
+
+
+    def _request(self, h, w, payload):
+        # A worker that hangs is killed, the read then fails and the pool restarts it
+        watchdog = threading.Timer(self._timeout if self._warm else self._startup_timeout, self._proc.kill)
+        watchdog.start()
+        try:
+            self._proc.stdin.write(REQUEST.pack(h, w, len(payload)) + payload)
+            self._proc.stdin.flush()
+            size, = REPLY.unpack(_read_exact(self._proc.stdout, REPLY.size))
+            reply = _read_exact(self._proc.stdout, size)
+            self._warm = True
+            return reply
+        finally:
+            watchdog.cancel()
+
+
+class TesseractPool:
+    """Fixed size pool of resident tesseract workers, one per core. Same interface as TesseractAPI,
+    so both cameras can share it and are recognised in parallel."""
+
+    def __init__(self, workers=0, psm=7, timeout=2.0, startup_timeout=20.0):
+        # The workers use the C API only. Without libtesseract they would fall back to a pytesseract
+        # process per read, which is what the pool is there to avoid, so refuse to start.
+        _load_library()
+        workers = workers or os.cpu_count() or 1
+        self._workers = [TesseractWorker(psm, timeout, startup_timeout) for _ in range(workers)]
+        self._idle = queue.Queue()
+        for worker in self._workers:
+            self._idle.put(worker)
+        self._checker = None
+
+
+    def recognize(self, gray):
+        return self.recognize_with_confidence(gray)[0]
+
+
+    def recognize_with_confidence(self, gray):
+        _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+
+        worker = self._idle.get()
+        try:
+            if not worker.alive():
+                worker.restart()
+            try:
+                return worker.recognize_with_confidence(binary)
+            except (OSError, EOFError) as e:
+                # Crashed or hung, restart it and give the read one more go
+                print(f"Tesseract worker failed ({e}), restarting")
+                worker.restart()
+                return worker.recognize_with_confidence(binary)
+        finally:
+            self._idle.put(worker)
+
+
+    def check(self):
+        # Called from a GUI timer. A ping or restart can block for seconds, so it runs on its own thread.
+        if self._checker is not None and self._checker.is_alive():
+            return
+        self._checker = threading.Thread(target=self._check, daemon=True)
+        self._checker.start()
+
+
+    def _check(self):
+        # Health check of the workers that are idle right now, busy ones are checked by their read
+        for _ in range(self._idle.qsize()):
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if not worker.alive() or not worker.ping():
+                print("Tesseract worker not responding, restarting")
+                worker.restart()
+            self._idle.put(worker)
+
+
+    def close(self):
+        if self._checker is not None:
+            self._checker.join()
+        for worker in self._workers:
+            worker.close()
+
+
+def _serve(psm):
+    # Replies go over the original stdout, anything tesseract or we print ends up on stderr
+    out = os.fdopen(os.dup(sys.stdout.fileno()), "wb")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    requests = sys.stdin.buffer
+
+    from tesseract_api import TesseractAPI
+    engine = TesseractAPI(psm=psm)
+
+    while True:
+        header = requests.read(REQUEST.size)
+        if len(header) != REQUEST.size:
+            break
+        h, w, size = REQUEST.unpack(header)
+        payload = _read_exact(requests, size)
+
+        reply = b""
+        if h and w:
+            binary = np.unpackbits(np.frombuffer(payload, dtype=np.uint8), count=h * w).reshape(h, w) * 255
+            text, symbols = engine.recognize_with_confidence(binary)
+            reply = json.dumps({"text": text, "symbols": symbols}).encode("utf-8")
+
+        out.write(REPLY.pack(len(reply)) + reply)
+        out.flush()
+
+    engine.close()
+
+
+if __name__ == "__main__":
+    _serve(int(sys.argv[1]) if len(sys.argv) > 1 else 7)
@@ -0,0 +1,29 @@
+import threading
+import cv2
+import numpy as np
+
+
+class OpenCVDnnModel:
+    """The digit CNN as ONNX (ai_model/export_onnx.py) on cv2.dnn, called like the Keras model:
+    model(batch) -> softmax."""
+
+    def __init__(self, path, threads=4):
+        # Process wide, it also limits the threads of every other OpenCV call
+        cv2.setNumThreads(threads)
+        self._net = cv2.dnn.readNetFromONNX(str(path))
+        self._net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+        self._net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+        # A Net is not thread safe, the camera threads take turns
+        self._lock = threading.Lock()
+
+
+    def __call__(self, batch, training=False):
+        # blobFromImages turns the (64, 64, 1) digits into one NCHW blob, the export takes NCHW input
+        blob = cv2.dnn.blobFromImages(list(np.asarray(batch, dtype=np.float32)), 1.0)
+        with self._lock:
+            self._net.setInput(blob)
+            return self._net.forward().copy()
+
+
+    def predict(self, batch, verbose=0):
+        return self(batch)
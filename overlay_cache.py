@@ -0,0 +1,48 @@
+from collections import OrderedDict
+import numpy as np
+
+OVERLAY_FILL = "fill"
+OVERLAY_OUTLINE = "outline"
+
+
+class OverlayCache:
+    """Small LRU of rendered RGBA overlays. An evicted buffer is cleared where it was drawn
+    and reused for the next overlay instead of allocating a new full frame array."""
+
+    def __init__(self, width, height, size=4):
+        self._width = width
+        self._height = height
+        self._size = max(2, size)  # the overlay on screen is never the one being recycled
+        self._cache = OrderedDict()
+
+
+    def render(self, rects, style=OVERLAY_FILL, thickness=3):
+        # rects is a tuple of ((x1, y1, x2, y2), (r, g, b, a)) drawn in order
+        key = (rects, style, thickness)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        if len(self._cache) >= self._size:
+            (old_rects, _, old_thickness), overlay = self._cache.popitem(last=False)
+            for roi, _ in old_rects:
+                self._draw(overlay, roi, (0, 0, 0, 0), OVERLAY_FILL, old_thickness)
+        else:
+            overlay = np.zeros((self._height, self._width, 4), dtype=np.uint8)
+
+        for roi, colour in rects:
+            self._draw(overlay, roi, colour, style, thickness)
+
+        self._cache[key] = overlay
+        return overlay
+
+
+    def _draw(self, overlay, roi, colour, style, thickness):
+        x1, y1, x2, y2 = roi
+        if style == OVERLAY_OUTLINE:
+            overlay[y1:y1 + thickness, x1:x2] = colour
+            overlay[max(y1, y2 - thickness):y2, x1:x2] = colour
+            overlay[y1:y2, x1:x1 + thickness] = colour
+            overlay[y1:y2, max(x1, x2 - thickness):x2] = colour
+        else:
+            overlay[y1:y2, x1:x2] = colour
@@ -0,0 +1,113 @@
+import cv2
+import numpy as np
+from segment_digits import ai_helper
+from ocr_preprocess import clean_ocr
+
+
+def center_and_pad(img, size=64):
+    h, w = img.shape
+    canvas = np.full((size, size), 255, dtype=np.uint8)  # white background
+    y_offset = (size - h) // 2
+    x_offset = (size - w) // 2
+    canvas[y_offset:y_offset + h, x_offset:x_offset + w] = img
+    return canvas
+
+
+class TemplateRecognizer:
+    """Template bank read, the confidence of a digit is its best normalised cross-correlation."""
+    name = "template"
+
+    def __init__(self, bank):
+        self._bank = bank
+
+
+    def read(self, gray):
+        segments = ai_helper.segment_digits(self, gray)
+        digits, scores = self._bank.match([digit_img for _, _, digit_img in segments])
+        return digits, scores.tolist()
+
+
+class CnnRecognizer:
+    """Digit CNN read, the confidence of a digit is its softmax probability."""
+    name = "ai"
+
+    def __init__(self, model, glyph_cache=None, bank=None, min_score=0.7):
+        self._model = model
+        # A cached digit is only trusted when the template bank confirms it, without a bank there is no cache
+        self._glyph_cache = glyph_cache if bank is not None and len(bank) else None
+        self._bank = bank
+        self._min_score = min_score
+        self.cached = 0
+
+
+    def read(self, gray):
+        return self.read_many([gray])[0]
+
+
+    def read_many(self, grays):
+        # All digits of all ROIs (both cameras) go through the model as one batch
+        glyphs, segments, owner = [], [], []
+        for n, gray in enumerate(grays):
+            for _, _, digit_img in ai_helper.segment_digits(self, gray):
+                segments.append(digit_img)
+                # resize to the CNN input size (64x64)
+                digit_img = center_and_pad(digit_img)
+                glyphs.append(cv2.resize(digit_img, (64,64), interpolation=cv2.INTER_CUBIC))
+                owner.append(n)
+
+        # The printer repeats the same glyphs, only the ones not seen before go through the model.
+        # A near glyph (a 6 for an 8) is a hit only when the templates say it is the cached digit.
+        digits = [None] * len(glyphs)
+        confidences = [0.0] * len(glyphs)
+        keys = [None] * len(glyphs)
+        if self._glyph_cache is not None:
+            for i, segment in enumerate(segments):
+                # Keyed on the segmented digit, the padded glyph binarizes to its whole crop
+                keys[i] = self._glyph_cache.key(segment)
+                hit = self._glyph_cache.get(keys[i], lambda digit, g=segment: self._bank.verify([g], digit, self._min_score)[0])
+                if hit is not None:
+                    digits[i], confidences[i] = hit
+
+        misses = [i for i, digit in enumerate(digits) if digit is None]
+        self.cached = len(glyphs) - len(misses)
+        if misses:
+            # One direct forward pass, predict() adds a lot of per call overhead for a handful of digits
+            batch = np.stack([glyphs[i] for i in misses])[..., None].astype(np.float32) / 255.0
+            preds = np.asarray(self._model(batch, training=False))
+            for i, pred in zip(misses, preds):
+                digits[i] = str(pred.argmax())
+                confidences[i] = float(pred.max())
+                if self._glyph_cache is not None:
+                    self._glyph_cache.put(keys[i], digits[i], confidences[i])
+
+        results = []
+        for n in range(len(grays)):
+            mine = [i for i, o in enumerate(owner) if o == n]
+            results.append(("".join(digits[i] for i in mine), [confidences[i] for i in mine]))
+        return results
+
+
+class OcrRecognizer:
+    """Tesseract read, the confidence of a digit is tesseract's symbol confidence."""
+    name = "ocr"
+
+    def __init__(self, engine, pipeline=None, expected_len=0):
+        self._engine = engine
+        self._pipeline = pipeline
+        self._expected_len = expected_len
+
+
+    def read(self, gray):
+        img = gray
+        if self._pipeline is not None and self._pipeline.stages:
+            img = self._pipeline.process(gray)
+
+        text, symbols = self._engine.recognize_with_confidence(img)
+        digits = clean_ocr(text, self._expected_len) or ""
+
+        # Line the symbol confidences up with the digits clean_ocr kept
+        read = [(char, conf) for char, conf in symbols if char.isdigit()]
+        start = "".join(char for char, _ in read).find(digits) if digits else -1
+        if start < 0:
+            return digits, [0.0] * len(digits)
+        return digits, [conf for _, conf in read[start:start + len(digits)]]
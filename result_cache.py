@@ -0,0 +1,112 @@
+import hashlib
+import threading
+from collections import OrderedDict
+import cv2
+import numpy as np
+
+
+def ink(gray):
+    # Otsu binarized ROI cropped to its ink, so the same print shifted in the ROI gives the same pixels
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    ys, xs = np.nonzero(binary)
+    if len(ys) == 0:
+        return binary
+    return binary[ys.min():ys.max() + 1, xs.min():xs.max() + 1]
+
+
+def exact_key(binary):
+    # Digest of every pixel, two ROIs only share it when their binarized print is identical
+    h, w = binary.shape
+    return hashlib.blake2b(np.packbits(binary > 0).tobytes(), digest_size=16, person=f"{h}x{w}".encode()).digest()
+
+
+def dhash(binary, size=(48, 12)):
+    # Difference hash: compare every cell of a small, area averaged copy with its right neighbour.
+    # Wide, because the ROI is a line of digits. Different numbers can hash (nearly) the same, so this
+    # only finds candidates.
+    w, h = size
+    if binary.size == 0:
+        return 0
+    small = cv2.resize(binary, (w + 1, h), interpolation=cv2.INTER_AREA)
+    bits = small[:, 1:] > small[:, :-1]
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+class RecognitionCache:
+    """Bounded LRU of recognised strings. A ROI whose binarized print is identical to a stored one is a hit.
+    A stored key within max_distance bits of its dHash (Hamming distance) is only a candidate, it is a hit
+    when the verify callable passed to get() confirms its string for this ROI."""
+
+    def __init__(self, size=64, max_distance=4, hash_size=(48, 12)):
+        self._size = size
+        self._max_distance = max_distance
+        self._hash_size = hash_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.near_hits = 0
+        self.rejected = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+    def key(self, gray):
+        binary = ink(gray)
+        return exact_key(binary), dhash(binary, self._hash_size)
+
+
+    def get(self, key, verify=None):
+        # Returns (text, confidence) or None. verify(text) is called outside the lock.
+        exact, near = key
+        with self._lock:
+            entry = self._entries.get(exact)
+            if entry is not None:
+                self.hits += 1
+                self._entries.move_to_end(exact)
+                return entry[:2]
+            candidates = []
+            if verify is not None:
+                candidates = sorted(((stored_hash ^ near).bit_count(), stored, text, confidence)
+                                    for stored, (text, confidence, stored_hash) in self._entries.items())
+                candidates = [c for c in candidates if c[0] <= self._max_distance]
+
+        tried = set()
+        for _, stored, text, confidence in candidates:
+            if text in tried:
+                continue
+            tried.add(text)
+            if verify(text):
+                with self._lock:
+                    self.hits += 1
+                    self.near_hits += 1
+                    if stored in self._entries:
+                        self._entries.move_to_end(stored)
+                return text, confidence
+            with self._lock:
+                self.rejected += 1
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+
+    def put(self, key, text, confidence=None):
+        exact, near = key
+        with self._lock:
+            self._entries[exact] = (text, confidence, near)
+            self._entries.move_to_end(exact)
+            while len(self._entries) > self._size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+    def stats(self):
+        total = self.hits + self.misses
+        rate = 100.0 * self.hits / total if total else 0.0
+        return (f"{self.hits} hits ({self.near_hits} verified near), {self.misses} misses ({rate:.0f}%), "
+                f"{self.rejected} rejected, {self.evictions} evictions")
@@ -0,0 +1,157 @@
+from PySide6.QtCore import Qt, QPoint, QRect, QSize
+from PySide6.QtWidgets import QRubberBand
+from frame_ring import FrameRing
+from overlay_cache import OverlayCache, OVERLAY_FILL
+
+ROI_COLOUR = (0, 255, 0, 128)
+ROI_COLOUR_ERROR = (255, 0, 0, 160)
+
+class RoiCameraMixin:
+    """ROI selection, overlay and ROI frame ring shared by the real and the simulated camera widget."""
+
+    def _init_roi(self, width, height, ring_size):
+        self.setMouseTracking(True)
+        self._rubber = QRubberBand(QRubberBand.Rectangle, self)
+        self._origin = QPoint()
+
+        self._frame_size = QSize(width, height)
+        self._roi = None
+
+        # Overlays are rendered once per state and reused, the same state is never pushed twice
+        self._overlay_cache = OverlayCache(width, height)
+        self._overlay_style = OVERLAY_FILL
+        self._overlay_colour = ROI_COLOUR
+        self._overlay_extra = {}
+        self._overlay_key = None
+
+        # The ROI of every completed request lands in the ring so a trigger can pick the
+        # frame closest to its edge instead of waiting for the next one.
+        self._ring = FrameRing(ring_size, (height, width))
+
+
+    def mousePressEvent(self, ev):
+        if ev.button() == Qt.LeftButton:
+            self._origin = ev.pos()
+            self._rubber.setGeometry(QRect(self._origin, QSize()))
+            self._rubber.show()
+
+        super().mousePressEvent(ev)
+
+
+    def mouseMoveEvent(self, ev):
+        if self._rubber.isVisible():
+            self._rubber.setGeometry(QRect(self._origin, ev.pos()).normalized())
+
+        super().mouseMoveEvent(ev)
+
+
+    def mouseReleaseEvent(self, ev):
+        if ev.button() == Qt.LeftButton and self._rubber.isVisible():
+            self._rubber.hide()
+            rect = self._rubber.geometry()
+            self.set_roi(rect)
+
+        super().mouseReleaseEvent(ev)
+
+
+    def GetRoi(self):
+        return self._roi
+
+
+    def capture_roi_at(self, timestamp_ns, timeout=0.2):
+        # timestamp_ns is on the time.monotonic_ns() clock, the same clock as SensorTimestamp.
+        # (None, None) when the ring has no frame (yet). There is no fallback to capture_roi(): that
+        # blocks until the Qt thread completes a request, which deadlocks when called from it.
+        return self._ring.nearest(timestamp_ns, timeout=timeout)
+
+
+    def capture_roi_after(self, timestamp_ns, timeout=0.2):
+        return self._ring.next_after(timestamp_ns, timeout=timeout)
+
+
+    def frame_period(self):
+        return self._ring.frame_period()
+
+
+    def _crop_rect(self):
+        if self._roi is None:
+            return (0, 0, self._frame_size.width(), self._frame_size.height())
+        return self._roi
+
+
+    def _store_roi(self, gray, timestamp):
+        # gray is the full single channel frame, only the ROI slice is copied into the ring
+        x1, y1, x2, y2 = self._crop_rect()
+        self._ring.push(gray[y1:y2, x1:x2], timestamp)
+
+
+    def set_roi(self, roi_rect=None):
+        fw, fh = self._frame_size.width(), self._frame_size.height()
+        ww, wh = self.width(), self.height()
+        x_offset = (ww - fw) // 2
+        y_offset = (wh - fh) // 2
+
+        if roi_rect is not None and isinstance(roi_rect, QRect):
+            # Coming from mouse event
+            x1 = int((roi_rect.x() - x_offset))
+            y1 = int((roi_rect.y() - y_offset))
+            x2 = int((roi_rect.x() + roi_rect.width() - x_offset))
+            y2 = int((roi_rect.y() + roi_rect.height() - y_offset))
+
+            # Clamp to frame
+            x1 = max(0, min(x1, fw - 1))
+            y1 = max(0, min(y1, fh - 1))
+            x2 = max(0, min(x2, fw - 1))
+            y2 = max(0, min(y2, fh - 1))
+
+            self._roi = (min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2))
+        elif roi_rect is not None:
+            # Coming from settings (tuple)
+            self._roi = roi_rect
+        # else leave as is
+        x1, y1, x2, y2 = self._crop_rect()
+        self._ring.reset((y2 - y1, x2 - x1))
+        self.update_overlay()
+
+
+    def set_overlay_style(self, style):
+        self._overlay_style = style
+        self.update_overlay()
+
+
+    def set_status_colour(self, colour):
+        # None hides the ROI, e.g. for the off phase of a flashing error
+        self._overlay_colour = colour
+        self.update_overlay()
+
+
+    def set_extra_roi(self, name, roi, colour=ROI_COLOUR):
+        # Additional rectangles drawn on top of the ROI, roi None removes it
+        if roi is None:
+            self._overlay_extra.pop(name, None)
+        else:
+            self._overlay_extra[name] = (tuple(roi), colour)
+        self.update_overlay()
+
+
+    def hide_overlay(self):
+        self._overlay_key = None
+        self.set_overlay(None)
+
+
+    def update_overlay(self):
+        rects = []
+        if self._roi is not None and self._overlay_colour is not None:
+            rects.append((tuple(self._roi), self._overlay_colour))
+        rects.extend(self._overlay_extra.values())
+        rects = tuple(rects)
+
+        key = (rects, self._overlay_style)
+        if key == self._overlay_key:
+            return
+        self._overlay_key = key
+
+        if not rects:
+            self.set_overlay(None)
+            return
+        self.set_overlay(self._overlay_cache.render(rects, self._overlay_style))
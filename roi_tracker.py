@@ -0,0 +1,83 @@
+import cv2
+import numpy as np
+
+
+class RoiTracker:
+    """Keeps a reference patch of the digit string and re-centres a tight ROI on it inside
+    the (generous) operator ROI, which acts as the search window."""
+
+    def __init__(self, scale=0.5, margin=4, min_score=0.5, min_area=50, max_area=5000):
+        self._scale = scale
+        self._margin = margin
+        self._min_score = min_score
+        self._min_area = min_area
+        self._max_area = max_area
+        self._template = None
+        self._size = None
+
+
+    def has_reference(self):
+        return self._template is not None
+
+
+    def reset(self):
+        self._template = None
+        self._size = None
+
+
+    def set_reference(self, gray):
+        box = self._ink_box(gray)
+        if box is None:
+            return False
+
+        x1, y1, x2, y2 = box
+        patch = gray[y1:y2, x1:x2]
+        self._size = (x2 - x1, y2 - y1)
+        self._template = cv2.resize(patch, None, fx=self._scale, fy=self._scale, interpolation=cv2.INTER_AREA)
+        return True
+
+
+    def track(self, gray):
+        # Returns the tight crop, its box inside gray and the match score. Falls back to the
+        # whole search window when there is no reference or no convincing match.
+        h, w = gray.shape[:2]
+        full = (0, 0, w, h)
+        if self._template is None:
+            return gray, full, 0.0
+
+        small = cv2.resize(gray, None, fx=self._scale, fy=self._scale, interpolation=cv2.INTER_AREA)
+        th, tw = self._template.shape[:2]
+        if small.shape[0] < th or small.shape[1] < tw:
+            return gray, full, 0.0
+
+        result = cv2.matchTemplate(small, self._template, cv2.TM_CCOEFF_NORMED)
+        _, score, _, (mx, my) = cv2.minMaxLoc(result)
+        if score < self._min_score:
+            return gray, full, float(score)
+
+        pw, ph = self._size
+        x1 = int(round(mx / self._scale))
+        y1 = int(round(my / self._scale))
+        x2 = min(w, x1 + pw)
+        y2 = min(h, y1 + ph)
+        return gray[y1:y2, x1:x2], (x1, y1, x2, y2), float(score)
+
+
+    def _ink_box(self, gray):
+        # Union of the digit-sized blobs, the same area filter segment_digits uses
+        _, th = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+        contours, _ = cv2.findContours(th, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+        boxes = []
+        for cnt in contours:
+            x, y, w, h = cv2.boundingRect(cnt)
+            if self._min_area <= w * h <= self._max_area:
+                boxes.append((x, y, x + w, y + h))
+        if not boxes:
+            return None
+
+        boxes = np.array(boxes)
+        h, w = gray.shape[:2]
+        m = self._margin
+        return (max(0, int(boxes[:, 0].min()) - m), max(0, int(boxes[:, 1].min()) - m),
+                min(w, int(boxes[:, 2].max()) + m), min(h, int(boxes[:, 3].max()) + m))
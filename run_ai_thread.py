@@ -1,50 +1,27 @@
 from PySide6.QtCore import QObject, QThread, Signal
-from segment_digits import ai_helper
-import tensorflow as tf
-from PIL import Image
-import cv2
-from qglpicamera2_wrapper import QGlPicamera2
-import numpy as np
+from recognizers import CnnRecognizer, center_and_pad
 
 class RunAIThread(QThread):
     finished = Signal()
-    ai_captured_result = Signal(object, int, str)
+    ai_captured_result = Signal(object, int, str, object)
 
-    def __init__(self, picam2, model):
+    def __init__(self, grays, model, glyph_cache=None, bank=None, min_score=0.7):
         super().__init__()
-        self._picam2 = picam2
-        self._model = model
+        # {cam_idx: gray}, the ROIs of both cameras are read in one batch
+        self._grays = grays
+        self._recognizer = CnnRecognizer(model, glyph_cache, bank, min_score)
 
     
     def run(self):
-        frame_array = self._picam2.picam2.capture_array()
+        cams = list(self._grays)
+        results = self._recognizer.read_many([self._grays[cam_idx] for cam_idx in cams])
 
-        x1, y1, x2, y2 = self._picam2.GetRoi()
-        cropped = frame_array[y1:y2, x1:x2]
-
-        segments = ai_helper.segment_digits(self, cropped)
-        digits = []
-        for _, _, digit_img in segments:
-            # resize to your CNN�s input size (64�64), normalize, etc.
-            digit_img = self.center_and_pad(digit_img)
-            d = cv2.resize(digit_img, (64,64), interpolation=cv2.INTER_CUBIC)
-            d = d.reshape(1,64,64,1)/255.0
-            pred = self._model.predict(d)
-            digits.append(str(pred.argmax()))
-        result = "".join(digits)  
-
-        rgb = cropped[...,:3].copy()
-
-        print(f"AI Cam{self._picam2.picam2.camera_idx}")
-        self.ai_captured_result.emit(rgb, self._picam2.picam2.camera_idx, result)
-        print(f"AI Cam{self._picam2.picam2.camera_idx} finished")
+        for cam_idx, (result, confidences) in zip(cams, results):
+            print(f"AI Cam{cam_idx} (confidence {[round(c, 2) for c in confidences]})")
+            self.ai_captured_result.emit(self._grays[cam_idx], cam_idx, result, confidences)
+        print(f"AI Cam{','.join(map(str, cams))} finished ({self._recognizer.cached} glyphs cached)")
         self.finished.emit()
 
 
     def center_and_pad(self, img, size=64):
-        h, w = img.shape
-        canvas = np.full((size, size), 255, dtype=np.uint8)  # white background
-        y_offset = (size - h) // 2
-        x_offset = (size - w) // 2
-        canvas[y_offset:y_offset + h, x_offset:x_offset + w] = img
-        return canvas
+        return center_and_pad(img, size)
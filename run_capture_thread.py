@@ -0,0 +1,20 @@
+from PySide6.QtCore import QThread, Signal
+
+
+class RunCaptureThread(QThread):
+    finished = Signal()
+    pair_captured = Signal(object, object, object)
+
+
+    def __init__(self, coordinator, frame_ns):
+        super().__init__()
+        self._coordinator = coordinator
+        self._frame_ns = frame_ns
+
+    
+    def run(self):
+        frames, skew, quality = self._coordinator.pair(self._frame_ns)
+
+        print(f"Capture skew {skew / 1_000_000:.2f} ms")
+        self.pair_captured.emit(frames, skew, quality)
+        self.finished.emit()
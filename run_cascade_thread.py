@@ -0,0 +1,32 @@
+from PySide6.QtCore import QThread, Signal
+
+class RunCascadeThread(QThread):
+    """Runs the cheapest engine first and only asks the next one when a digit is not confident enough."""
+    finished = Signal()
+    cascade_captured_result = Signal(object, int, str, object)
+
+
+    def __init__(self, gray, cam_idx, stages, expected_len=0):
+        super().__init__()
+        self._gray = gray
+        self._cam_idx = cam_idx
+        self._stages = stages
+        self._expected_len = expected_len
+
+    
+    def run(self):
+        gray = self._gray
+
+        digits = ""
+        for i, (recognizer, min_confidence) in enumerate(self._stages):
+            digits, confidences = recognizer.read(gray)
+            confident = bool(digits) and min(confidences) >= min_confidence
+            if self._expected_len > 0 and len(digits) != self._expected_len:
+                confident = False
+            print(f"Cascade Cam{self._cam_idx} {recognizer.name}: {digits} {[round(c, 2) for c in confidences]}")
+            # The last engine has the final word
+            if confident or i == len(self._stages) - 1:
+                break
+
+        self.cascade_captured_result.emit(gray, self._cam_idx, digits, confidences)
+        self.finished.emit()
@@ -0,0 +1,27 @@
+from PySide6.QtCore import QThread, Signal
+
+class RunEngineLoadThread(QThread):
+    """Imports and loads the recognition engines off the GUI thread, so the window and previews come up first."""
+    finished = Signal()
+    engines_loaded = Signal(object, object)
+
+
+    def __init__(self, loaders):
+        super().__init__()
+        # {name: callable returning the loaded engine}
+        self._loaders = loaders
+        # Also kept here, for a window that closes before the signal is delivered
+        self.loaded = {}
+
+
+    def run(self):
+        errors = {}
+        for name, loader in self._loaders.items():
+            print(f"Loading {name}")
+            try:
+                self.loaded[name] = loader()
+            except Exception as e:
+                errors[name] = str(e)
+
+        self.engines_loaded.emit(dict(self.loaded), errors)
+        self.finished.emit()
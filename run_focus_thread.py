@@ -0,0 +1,21 @@
+from PySide6.QtCore import QThread, Signal
+from focus_sweep import FocusSweep
+
+
+class RunFocusThread(QThread):
+    finished = Signal()
+    focus_found = Signal(int, float, float)
+
+
+    def __init__(self, picam2, cam_idx):
+        super().__init__()
+        self._picam2 = picam2
+        self._cam_idx = cam_idx
+
+    
+    def run(self):
+        pos, score = FocusSweep(self._picam2).run()
+
+        print(f"Focus Cam{self._cam_idx}: LensPosition {pos:.2f}, sharpness {score:.1f}")
+        self.focus_found.emit(self._cam_idx, pos, score)
+        self.finished.emit()
@@ -1,31 +1,27 @@
 from PySide6.QtCore import QObject, QThread, Signal
-import pytesseract
-from PIL import Image
-import cv2
-from qglpicamera2_wrapper import QGlPicamera2
+from recognizers import OcrRecognizer
 
 class RunOCRThread(QThread):
     finished = Signal()
-    ocr_captured_result = Signal(object, int, str)
+    ocr_captured_result = Signal(object, int, str, object)
 
 
-    def __init__(self, picam2):
+    def __init__(self, gray, cam_idx, engine, pipeline=None, expected_len=0):
         super().__init__()
-        self._picam2 = picam2
+        self._gray = gray
+        self._cam_idx = cam_idx
+        self._pipeline = pipeline
+        self._recognizer = OcrRecognizer(engine, pipeline, expected_len)
 
     
     def run(self):
-        frame_array = self._picam2.picam2.capture_array()
+        gray = self._gray
+        # A read that fails the length check is reported as empty, which never matches
+        digits, confidences = self._recognizer.read(gray)
+        if self._pipeline is not None and self._pipeline.stages:
+            print(f"OCR Cam{self._cam_idx} preprocess: {self._pipeline.report()}")
 
-        x1, y1, x2, y2 = self._picam2.GetRoi()
-        cropped = frame_array[y1:y2, x1:x2]
-        gray = cv2.cvtColor(cropped, cv2.COLOR_RGB2GRAY)
-        text = pytesseract.image_to_string(gray, config="--oem 3 --psm 7 -c tessedit_char_whitelist=0123456789")
-        digits = ''.join(filter(str.isdigit, text))
-
-        rgb = cropped[...,:3].copy()
-        
-        print(f"OCR Cam{self._picam2.picam2.camera_idx}")
-        self.ocr_captured_result.emit(rgb, self._picam2.picam2.camera_idx, digits)
-        print(f"OCR Cam{self._picam2.picam2.camera_idx} finished")
+        print(f"OCR Cam{self._cam_idx} (confidence {[round(c, 2) for c in confidences]})")
+        self.ocr_captured_result.emit(gray, self._cam_idx, digits, confidences)
+        print(f"OCR Cam{self._cam_idx} finished")
         self.finished.emit()
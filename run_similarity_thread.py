@@ -0,0 +1,19 @@
+from PySide6.QtCore import QThread, Signal
+from image_similarity import roi_similarity
+
+class RunSimilarityThread(QThread):
+    finished = Signal()
+    similarity_result = Signal(object, float)
+
+
+    def __init__(self, frames):
+        super().__init__()
+        self._frames = frames
+
+    
+    def run(self):
+        score = roi_similarity(self._frames[0], self._frames[1])
+
+        print(f"Similarity {score:.3f}")
+        self.similarity_result.emit(self._frames, score)
+        self.finished.emit()
@@ -0,0 +1,67 @@
+import cv2
+import numpy as np
+from PySide6.QtCore import QThread, Signal
+from ocr_preprocess import clean_ocr
+
+
+def stitch_rois(grays, height=64, gap=0.5):
+    # Scale every ROI to the same height and stack them, one text line per camera,
+    # separated by a blank band of the background colour so tesseract sees separate lines
+    border = np.concatenate([np.concatenate((g[0], g[-1], g[:, 0], g[:, -1])) for g in grays])
+    background = int(np.median(border))
+
+    lines = [cv2.resize(g, (max(1, round(g.shape[1] * height / g.shape[0])), height), interpolation=cv2.INTER_AREA
+                        if g.shape[0] > height else cv2.INTER_CUBIC) for g in grays]
+    width = max(line.shape[1] for line in lines)
+    sep = int(height * gap)
+
+    stitched = np.full((len(lines) * (height + sep) + sep, width + 2 * sep), background, dtype=np.uint8)
+    for i, line in enumerate(lines):
+        y = sep + i * (height + sep)
+        stitched[y:y + height, sep:sep + line.shape[1]] = line
+    return stitched
+
+
+def split_lines(text, count, expected_len=0):
+    # One line of digits per camera, anything else is ambiguous and gets None
+    lines = [clean_ocr(line, expected_len) for line in text.splitlines() if any(ch.isdigit() for ch in line)]
+    if len(lines) != count or None in lines:
+        return None
+    return lines
+
+
+class RunStitchedOCRThread(QThread):
+    """Reads the ROIs of both cameras with one multi-line (PSM 6) tesseract pass."""
+    finished = Signal()
+    ocr_captured_result = Signal(object, int, str, object)
+
+
+    def __init__(self, grays, engine, fallback, height=64, pipelines=None, expected_len=0):
+        super().__init__()
+        self._grays = grays
+        self._engine = engine
+        self._fallback = fallback
+        self._height = height
+        self._pipelines = pipelines
+        self._expected_len = expected_len
+
+
+    def run(self):
+        imgs = self._grays
+        if self._pipelines is not None:
+            imgs = [self._pipelines[cam_idx].process(gray) if self._pipelines[cam_idx].stages else gray
+                    for cam_idx, gray in enumerate(self._grays)]
+
+        text = self._engine.recognize(stitch_rois(imgs, self._height))
+        results = split_lines(text, len(imgs), self._expected_len)
+
+        if results is None:
+            # Lines merged, split or dropped, read every camera on its own instead
+            print(f"Stitched OCR ambiguous ({text.strip()!r}), falling back to per camera OCR")
+            results = [clean_ocr(self._fallback[cam_idx].recognize(img), self._expected_len) or ""
+                       for cam_idx, img in enumerate(imgs)]
+
+        # The stitched pass has no per digit confidences
+        for cam_idx, gray in enumerate(self._grays):
+            self.ocr_captured_result.emit(gray, cam_idx, results[cam_idx], None)
+        self.finished.emit()
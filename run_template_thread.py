@@ -0,0 +1,25 @@
+from PySide6.QtCore import QThread, Signal
+from segment_digits import ai_helper
+
+class RunTemplateThread(QThread):
+    finished = Signal()
+    template_captured_result = Signal(object, int, str, object)
+
+
+    def __init__(self, gray, cam_idx, bank):
+        super().__init__()
+        self._gray = gray
+        self._cam_idx = cam_idx
+        self._bank = bank
+
+    
+    def run(self):
+        gray = self._gray
+
+        segments = ai_helper.segment_digits(self, gray)
+        result, scores = self._bank.match([digit_img for _, _, digit_img in segments])
+
+        print(f"Template Cam{self._cam_idx}")
+        self.template_captured_result.emit(gray, self._cam_idx, result, scores)
+        print(f"Template Cam{self._cam_idx} finished")
+        self.finished.emit()
@@ -0,0 +1,233 @@
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+import cv2
+import numpy as np
+from PySide6.QtCore import Qt, QTimer
+from PySide6.QtGui import QImage, QPixmap
+from PySide6.QtWidgets import QLabel
+from roi_camera import RoiCameraMixin
+
+IMAGE_SUFFIXES = (".png", ".jpg", ".jpeg", ".bmp")
+
+
+class SimulatedRequest:
+    """Completed request of the simulated camera, the subset of picamera2's CompletedRequest we use."""
+
+    def __init__(self, gray, timestamp):
+        self._gray = gray
+        self._metadata = {"SensorTimestamp": timestamp}
+
+
+    def get_metadata(self):
+        return self._metadata
+
+
+    def make_array(self, name="main"):
+        # lores is the grayscale (Y plane) stream, main the 4 channel preview stream
+        if name == "lores":
+            return self._gray
+        return cv2.cvtColor(self._gray, cv2.COLOR_GRAY2BGRA)
+
+
+class SimulatedPicamera2:
+    """Stand-in for Picamera2 that replays an image folder or a video file at a fixed frame rate."""
+
+    def __init__(self, source, camera_num=0, size=(640, 480), fps=30.0, focus=None):
+        self.camera_idx = camera_num
+        self.camera_controls = {"LensPosition": (0.0, 15.0, 1.0)}
+        self.post_callback = None
+
+        self._source = Path(source)
+        self._size = size
+        self._period = 1.0 / fps
+        # LensPosition at which the simulated lens is sharp, None keeps it sharp at every position
+        self._focus = focus
+        self._controls = {}
+        self._overlay = None
+
+        self._request = None
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread = None
+
+        if self._source.is_dir():
+            self._images = sorted(p for p in self._source.iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+            if not self._images:
+                raise FileNotFoundError(f"No images found in {self._source}")
+            self._video = None
+        else:
+            self._images = None
+            self._video = cv2.VideoCapture(str(self._source))
+            if not self._video.isOpened():
+                raise FileNotFoundError(f"Cannot open video {self._source}")
+        # Give each camera its own position in the source so both do not replay in lockstep
+        self._index = camera_num
+
+
+    def set_controls(self, controls):
+        self._controls.update(controls)
+
+
+    def set_overlay(self, overlay):
+        self._overlay = overlay
+
+
+    def start(self, show_preview=False):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+    def close(self):
+        self.stop()
+        if self._video is not None:
+            self._video.release()
+
+
+    def capture_array(self, name="main"):
+        with self.captured_request() as request:
+            return request.make_array(name).copy()
+
+
+    @contextmanager
+    def captured_request(self):
+        # Like Picamera2, wait for the next frame to complete
+        with self._cond:
+            previous = self._request
+            self._cond.wait_for(lambda: self._request is not previous)
+            request = self._request
+        yield request
+
+
+    def latest_request(self):
+        with self._cond:
+            return self._request
+
+
+    def _run(self):
+        next_time = time.monotonic()
+        while self._running:
+            request = SimulatedRequest(self._next_frame(), time.monotonic_ns())
+
+            if self.post_callback is not None:
+                self.post_callback(request)
+
+            with self._cond:
+                self._request = request
+                self._cond.notify_all()
+
+            next_time += self._period
+            time.sleep(max(0.0, next_time - time.monotonic()))
+
+
+    def _next_frame(self):
+        if self._images is not None:
+            img = cv2.imread(str(self._images[self._index % len(self._images)]), cv2.IMREAD_GRAYSCALE)
+            self._index += 1
+        else:
+            ok, img = self._video.read()
+            if not ok:
+                self._video.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                ok, img = self._video.read()
+            img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        return self._defocus(self._letterbox(img))
+
+
+    def _defocus(self, frame):
+        # Blur grows with the distance to the in-focus position, so a focus sweep has something to find
+        pos = self._controls.get("LensPosition")
+        if pos is None or self._focus is None:
+            return frame
+        sigma = 0.5 * abs(pos - self._focus)
+        if sigma < 0.1:
+            return frame
+        return cv2.GaussianBlur(frame, (0, 0), sigma)
+
+
+    def _letterbox(self, img):
+        # Scale the source down (never up) to fit the sensor size and centre it on a grey frame
+        fw, fh = self._size
+        h, w = img.shape
+        scale = min(1.0, fw / w, fh / h)
+        if scale < 1.0:
+            img = cv2.resize(img, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+            h, w = img.shape
+
+        frame = np.full((fh, fw), 128, dtype=np.uint8)
+        y = (fh - h) // 2
+        x = (fw - w) // 2
+        frame[y:y + h, x:x + w] = img
+        return frame
+
+
+class QSimPicamera2(RoiCameraMixin, QLabel):
+    """Drop-in replacement for QGlPicamera2 that previews a SimulatedPicamera2 in a plain QLabel."""
+
+    def __init__(self,
+                 source,
+                 parent=None,
+                 *,
+                 camid: int = 0,
+                 width: int = 640,
+                 height: int = 480,
+                 keep_ar: bool = True,
+                 ring_size: int = 8,
+                 fps: float = 30.0,
+                 focus: float = None):
+
+        self.picam2 = SimulatedPicamera2(source, camera_num=camid, size=(width, height), fps=fps, focus=focus)
+
+        super().__init__(parent)
+        self.setAlignment(Qt.AlignCenter)
+        self.setMinimumSize(width, height)
+
+        self._init_roi(width, height, ring_size)
+        self._overlay = None
+        self.picam2.post_callback = self._on_request
+
+        self._preview_timer = QTimer(self)
+        self._preview_timer.timeout.connect(self._update_preview)
+        self._preview_timer.start(int(1000 / fps))
+
+
+    def set_overlay(self, overlay):
+        self._overlay = overlay
+        self.picam2.set_overlay(overlay)
+
+
+    def capture_roi(self, stream="lores"):
+        x1, y1, x2, y2 = self._crop_rect()
+
+        with self.picam2.captured_request() as request:
+            timestamp = request.get_metadata()["SensorTimestamp"]
+            return request.make_array(stream)[y1:y2, x1:x2].copy(), timestamp
+
+
+    def _on_request(self, request):
+        self._store_roi(request.make_array("lores"), request.get_metadata()["SensorTimestamp"])
+
+
+    def _update_preview(self):
+        request = self.picam2.latest_request()
+        if request is None:
+            return
+
+        rgb = cv2.cvtColor(request.make_array("lores"), cv2.COLOR_GRAY2RGB)
+        if self._overlay is not None:
+            alpha = self._overlay[..., 3:].astype(np.uint16)
+            rgb = ((rgb * (255 - alpha) + self._overlay[..., :3] * alpha) // 255).astype(np.uint8)
+
+        h, w, _ = rgb.shape
+        image = QImage(rgb.data, w, h, 3 * w, QImage.Format_RGB888)
+        self.setPixmap(QPixmap.fromImage(image))
@@ -0,0 +1,103 @@
+import re
+from pathlib import Path
+import cv2
+import numpy as np
+from segment_digits import ai_helper
+
+# Captures are saved by RunImageThread as {cam}_{digits}_{index}.png
+CAPTURE_NAME = re.compile(r"^\d+_(\d+)_\d+$")
+
+
+def normalise_glyph(img, size=32):
+    # Pad the digit to a white square, scale it to size x size and make it zero mean, unit length,
+    # so a dot product of two glyphs is their normalised cross-correlation
+    h, w = img.shape
+    side = max(h, w)
+    canvas = np.full((side, side), 255, dtype=np.uint8)
+    canvas[(side - h) // 2:(side - h) // 2 + h, (side - w) // 2:(side - w) // 2 + w] = img
+    glyph = cv2.resize(canvas, (size, size), interpolation=cv2.INTER_AREA).astype(np.float32).ravel()
+    glyph -= glyph.mean()
+    norm = np.linalg.norm(glyph)
+    return glyph / norm if norm > 0 else glyph
+
+
+class TemplateBank:
+    """Digit templates of one product's printer font, matched with normalised cross-correlation."""
+
+    def __init__(self, templates=None, labels=None, size=32):
+        self.size = size
+        self._templates = templates if templates is not None else np.zeros((0, size * size), dtype=np.float32)
+        self._labels = labels if labels is not None else np.zeros(0, dtype=np.int64)
+
+
+    def __len__(self):
+        return len(self._labels)
+
+
+    @classmethod
+    def build(cls, paths, size=32, per_class=16):
+        # Only captures that segment into as many glyphs as their name has digits are used
+        templates, labels = [], []
+        count = np.zeros(10, dtype=int)
+        for path in sorted(paths):
+            m = CAPTURE_NAME.match(Path(path).stem)
+            if not m:
+                continue
+            gray = cv2.imread(str(path), cv2.IMREAD_GRAYSCALE)
+            if gray is None:
+                continue
+            segments = ai_helper.segment_digits(None, gray)
+            if len(segments) != len(m.group(1)):
+                continue
+
+            for (_, _, digit_img), digit in zip(segments, m.group(1)):
+                label = int(digit)
+                if count[label] >= per_class:
+                    continue
+                templates.append(normalise_glyph(digit_img, size))
+                labels.append(label)
+                count[label] += 1
+            if count.min() >= per_class:
+                break
+
+        if not templates:
+            return cls(size=size)
+        return cls(np.stack(templates), np.array(labels, dtype=np.int64), size)
+
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data["templates"], data["labels"], int(data["size"]))
+
+
+    def save(self, path):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        np.savez(path, templates=self._templates, labels=self._labels, size=self.size)
+
+
+    def match(self, glyphs):
+        # All glyphs against all templates in one matrix product, then the best template per class.
+        # Returns the digits and the score of every digit.
+        if len(glyphs) == 0 or len(self) == 0:
+            return "", np.zeros(0, dtype=np.float32)
+
+        scores = np.stack([normalise_glyph(g, self.size) for g in glyphs]) @ self._templates.T
+        per_class = np.full((len(glyphs), 10), -1.0, dtype=np.float32)
+        np.maximum.at(per_class, (np.arange(len(glyphs))[:, None], self._labels[None, :]), scores)
+
+        best = per_class.argmax(axis=1)
+        return "".join(map(str, best)), per_class[np.arange(len(glyphs)), best]
+
+
+    def verify(self, glyphs, expected, min_score=0.7, margin=0.05):
+        # Does the ROI show the expected string? Every glyph must look like its expected digit and
+        # clearly more like it than like any other digit. Returns the verdict and the expected scores.
+        if len(glyphs) != len(expected) or len(self) == 0 or not expected.isdigit():
+            return False, np.zeros(0, dtype=np.float32)
+
+        scores = np.stack([normalise_glyph(g, self.size) for g in glyphs]) @ self._templates.T
+        wanted = self._labels[None, :] == np.array([int(d) for d in expected])[:, None]
+        hit = np.where(wanted, scores, -1.0).max(axis=1)
+        other = np.where(wanted, -1.0, scores).max(axis=1)
+        return bool(np.all(hit >= min_score) and np.all(hit >= other + margin)), hit
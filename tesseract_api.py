@@ -0,0 +1,168 @@
+import ctypes
+import ctypes.util
+import threading
+import numpy as np
+import pytesseract
+
+DIGITS = "0123456789"
+RIL_SYMBOL = 4
+LIBRARY_NAMES = ("libtesseract.so.5", "libtesseract.so.4", "libtesseract.so", "libtesseract-5.dll", "tesseract50.dll")
+
+_lib = None
+
+
+def _load_library():
+    global _lib
+    if _lib is not None:
+        return _lib
+
+    names = [ctypes.util.find_library("tesseract")] + list(LIBRARY_NAMES)
+    for name in names:
+        if not name:
+            continue
+        try:
+            lib = ctypes.CDLL(name)
+            break
+        except OSError:
+            continue
+    else:
+        raise OSError("libtesseract not found, install libtesseract-dev")
+
+    lib.TessBaseAPICreate.restype = ctypes.c_void_p
+    lib.TessBaseAPIInit3.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_char_p]
+    lib.TessBaseAPIInit3.restype = ctypes.c_int
+    lib.TessBaseAPISetPageSegMode.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    lib.TessBaseAPISetVariable.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_char_p]
+    lib.TessBaseAPISetVariable.restype = ctypes.c_int
+    lib.TessBaseAPISetImage.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int]
+    lib.TessBaseAPIGetUTF8Text.argtypes = [ctypes.c_void_p]
+    lib.TessBaseAPIGetUTF8Text.restype = ctypes.c_void_p
+    lib.TessDeleteText.argtypes = [ctypes.c_void_p]
+    lib.TessBaseAPIRecognize.argtypes = [ctypes.c_void_p, ctypes.c_void_p]
+    lib.TessBaseAPIRecognize.restype = ctypes.c_int
+    lib.TessBaseAPIGetIterator.argtypes = [ctypes.c_void_p]
+    lib.TessBaseAPIGetIterator.restype = ctypes.c_void_p
+    lib.TessResultIteratorGetUTF8Text.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    lib.TessResultIteratorGetUTF8Text.restype = ctypes.c_void_p
+    lib.TessResultIteratorConfidence.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    lib.TessResultIteratorConfidence.restype = ctypes.c_float
+    lib.TessResultIteratorNext.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    lib.TessResultIteratorNext.restype = ctypes.c_int
+    lib.TessResultIteratorDelete.argtypes = [ctypes.c_void_p]
+    lib.TessBaseAPIEnd.argtypes = [ctypes.c_void_p]
+    lib.TessBaseAPIDelete.argtypes = [ctypes.c_void_p]
+
+    _lib = lib
+    return lib
+
+
+class TesseractAPI:
+    """One initialised TessBaseAPI kept for the lifetime of the worker. The traineddata, the
+    digit whitelist and the page segmentation mode are loaded once, images go in as raw buffers."""
+
+    def __init__(self, psm=7, lang="eng", whitelist=DIGITS, datapath=None):
+        self._api = None
+        self._lib = _load_library()
+        self._api = self._lib.TessBaseAPICreate()
+        if self._lib.TessBaseAPIInit3(self._api, datapath.encode() if datapath else None, lang.encode()) != 0:
+            self._lib.TessBaseAPIDelete(self._api)
+            self._api = None
+            raise RuntimeError(f"Could not initialise tesseract for language {lang}")
+
+        self._lib.TessBaseAPISetPageSegMode(self._api, psm)
+        self._lib.TessBaseAPISetVariable(self._api, b"tessedit_char_whitelist", whitelist.encode())
+        # A TessBaseAPI is not thread safe, callers sharing one engine are serialised
+        self._lock = threading.Lock()
+
+
+    def recognize(self, gray):
+        gray = np.ascontiguousarray(gray, dtype=np.uint8)
+        h, w = gray.shape[:2]
+        channels = 1 if gray.ndim == 2 else gray.shape[2]
+
+        with self._lock:
+            self._lib.TessBaseAPISetImage(self._api, gray.ctypes.data, w, h, channels, gray.strides[0])
+            return self._text()
+
+
+    def recognize_with_confidence(self, gray):
+        # The text plus (character, confidence 0..1) of every recognised symbol
+        gray = np.ascontiguousarray(gray, dtype=np.uint8)
+        h, w = gray.shape[:2]
+        channels = 1 if gray.ndim == 2 else gray.shape[2]
+
+        with self._lock:
+            self._lib.TessBaseAPISetImage(self._api, gray.ctypes.data, w, h, channels, gray.strides[0])
+            if self._lib.TessBaseAPIRecognize(self._api, None) != 0:
+                return "", []
+            text = self._text()
+
+            symbols = []
+            it = self._lib.TessBaseAPIGetIterator(self._api)
+            if it:
+                while True:
+                    char_ptr = self._lib.TessResultIteratorGetUTF8Text(it, RIL_SYMBOL)
+                    if char_ptr:
+                        char = ctypes.string_at(char_ptr).decode("utf-8", errors="ignore")
+                        self._lib.TessDeleteText(char_ptr)
+                        symbols.append((char, self._lib.TessResultIteratorConfidence(it, RIL_SYMBOL) / 100.0))
+                    if not self._lib.TessResultIteratorNext(it, RIL_SYMBOL):
+                        break
+                self._lib.TessResultIteratorDelete(it)
+        return text, symbols
+
+
+    def _text(self):
+        text_ptr = self._lib.TessBaseAPIGetUTF8Text(self._api)
+        if not text_ptr:
+            return ""
+        text = ctypes.string_at(text_ptr).decode("utf-8", errors="ignore")
+        self._lib.TessDeleteText(text_ptr)
+        return text
+
+
+    def close(self):
+        if self._api is not None:
+            self._lib.TessBaseAPIEnd(self._api)
+            self._lib.TessBaseAPIDelete(self._api)
+            self._api = None
+
+
+    def __del__(self):
+        self.close()
+
+
+class PyTesseractEngine:
+    """Fallback with the same interface for machines without libtesseract, one subprocess per read."""
+
+    def __init__(self, psm=7, lang="eng", whitelist=DIGITS):
+        self._config = f"--oem 3 --psm {psm} -c tessedit_char_whitelist={whitelist}"
+        self._lang = lang
+
+
+    def recognize(self, gray):
+        return pytesseract.image_to_string(gray, lang=self._lang, config=self._config)
+
+
+    def recognize_with_confidence(self, gray):
+        # image_to_data only has word confidences, every character of a word gets its word's
+        data = pytesseract.image_to_data(gray, lang=self._lang, config=self._config, output_type=pytesseract.Output.DICT)
+        lines, symbols = {}, []
+        for word, conf, block, line in zip(data["text"], data["conf"], data["block_num"], data["line_num"]):
+            if not word.strip():
+                continue
+            lines.setdefault((block, line), []).append(word)
+            symbols.extend((char, max(float(conf), 0.0) / 100.0) for char in word)
+        return "\n".join(" ".join(words) for words in lines.values()), symbols
+
+
+    def close(self):
+        pass
+
+
+def create_ocr_engine(psm=7):
+    try:
+        return TesseractAPI(psm=psm)
+    except (OSError, RuntimeError) as e:
+        print(f"Tesseract C API unavailable ({e}), falling back to pytesseract")
+        return PyTesseractEngine(psm=psm)
@@ -0,0 +1,64 @@
+import threading
+import numpy as np
+
+TFLITE_VARIANTS = ("fp16", "int8")
+
+
+def _interpreter_class():
+    # The small tflite_runtime wheel is enough on the Pi, full TensorFlow works as well. Imported
+    # here and not with the module, so importing this file never pulls in TensorFlow.
+    # ai_edge_litert is the successor of tflite_runtime, tf.lite.Interpreter is deprecated.
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        try:
+            from ai_edge_litert.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+    return Interpreter
+
+
+class TFLiteModel:
+    """The digit CNN on the TFLite interpreter, called like the Keras model: model(batch) -> softmax.
+    Float models run through the XNNPACK delegate the interpreter applies by default, int8 models
+    get their input quantised and their output dequantised here."""
+
+    def __init__(self, path, threads=4):
+        self._interpreter = _interpreter_class()(model_path=str(path), num_threads=threads)
+        self._interpreter.allocate_tensors()
+        self._input = self._interpreter.get_input_details()[0]
+        self._output = self._interpreter.get_output_details()[0]
+        self._batch = self._input["shape"][0]
+        # An interpreter is not thread safe, the camera threads take turns
+        self._lock = threading.Lock()
+
+
+    def __call__(self, batch, training=False):
+        batch = np.asarray(batch, dtype=np.float32)
+        with self._lock:
+            if len(batch) != self._batch:
+                # Resizing reallocates, it only happens when the number of digits changes
+                self._interpreter.resize_tensor_input(self._input["index"], [len(batch), *batch.shape[1:]])
+                self._interpreter.allocate_tensors()
+                self._input = self._interpreter.get_input_details()[0]
+                self._output = self._interpreter.get_output_details()[0]
+                self._batch = len(batch)
+
+            if self._input["dtype"] != np.float32:
+                scale, zero_point = self._input["quantization"]
+                info = np.iinfo(self._input["dtype"])
+                batch = np.clip(np.round(batch / scale + zero_point), info.min, info.max).astype(self._input["dtype"])
+
+            self._interpreter.set_tensor(self._input["index"], batch)
+            self._interpreter.invoke()
+            out = self._interpreter.get_tensor(self._output["index"])
+
+            if self._output["dtype"] != np.float32:
+                scale, zero_point = self._output["quantization"]
+                out = (out.astype(np.float32) - zero_point) * scale
+        return out
+
+
+    def predict(self, batch, verbose=0):
+        return self(batch)
@@ -0,0 +1,45 @@
+from pathlib import Path
+
+PREDICT_MODES = ("off", "same", "increment", "joblist")
+
+
+class ValuePredictor:
+    """Predicts the next string one camera should see: the same as the last read, the last read + 1,
+    or the next entry of a job list."""
+
+    def __init__(self, mode="same", job_list=None):
+        self.mode = mode
+        self._last = None
+        self._jobs = []
+        self._pos = 0
+        if mode == "joblist" and job_list:
+            path = Path(job_list)
+            if path.exists():
+                self._jobs = [line.strip() for line in path.read_text().splitlines() if line.strip()]
+
+
+    def predict(self):
+        match self.mode:
+            case "same":
+                return self._last
+            case "increment":
+                if self._last is None:
+                    return None
+                # Keep the leading zeros of the printed code
+                return str(int(self._last) + 1).zfill(len(self._last))
+            case "joblist":
+                if self._pos < len(self._jobs):
+                    return self._jobs[self._pos]
+        return None
+
+
+    def observe(self, digits):
+        if not digits:
+            return
+        self._last = digits
+        if self.mode == "joblist":
+            if self._pos < len(self._jobs) and self._jobs[self._pos] == digits:
+                self._pos += 1
+            elif digits in self._jobs[self._pos:]:
+                # Packages were skipped, resync on the value we did read
+                self._pos = self._jobs.index(digits, self._pos) + 1